@@ -98,6 +98,7 @@ class AniDB:
         self.username = None
         self.password = None
         self._delay = None
+        self.memo = util.LRUCache("AniDB", config.general["memory_cache_size"])
 
     def authorize(self, client, version, expiration):
         self.client = client
@@ -182,6 +183,10 @@ class AniDB:
         return anidb_ids[:limit]
 
     def get_anime(self, anidb_id, ignore_cache=False):
+        if not ignore_cache:
+            obj = self.memo.get(anidb_id)
+            if obj is not None:
+                return obj
         expired = None
         anidb_dict = None
         if self.config.Cache and not ignore_cache:
@@ -202,7 +207,7 @@ class AniDB:
         obj = AniDBObj(self, anidb_id, anidb_dict)
         if self.config.Cache and not ignore_cache:
             self.config.Cache.update_anidb(expired, anidb_id, obj, self.expiration)
-        return obj
+        return self.memo.put(anidb_id, obj)
 
     def get_anidb_ids(self, method, data):
         anidb_ids = []
@@ -1,4 +1,5 @@
-import os, re, time
+import os, re, threading, time
+from concurrent.futures import ThreadPoolExecutor
 from arrapi import ArrException
 from datetime import datetime
 from modules import anidb, anilist, flixpatrol, icheckmovies, imdb, letterboxd, mal, plex, radarr, reciperr, sonarr, tautulli, tmdb, trakt, tvdb, mdblist, util
@@ -14,6 +15,17 @@ from urllib.parse import quote
 logger = util.logger
 
 advance_new_agent = ["item_metadata_language", "item_use_original_title"]
+gather_providers = {
+    "anidb": anidb.builders, "anilist": anilist.builders, "flixpatrol": flixpatrol.builders, "icheckmovies": icheckmovies.builders,
+    "imdb": imdb.builders, "letterboxd": letterboxd.builders, "mal": mal.builders, "mdblist": mdblist.builders, "plex": plex.builders,
+    "radarr": radarr.builders, "reciperr": reciperr.builders, "sonarr": sonarr.builders, "tautulli": tautulli.builders,
+    "tmdb": tmdb.builders, "trakt": trakt.builders, "tvdb": tvdb.builders
+}
+gather_builder_providers = {b: p for p, builder_list in gather_providers.items() for b in builder_list}
+gather_limits = {"anidb": 1, "anilist": 1, "mal": 1, "icheckmovies": 1, "letterboxd": 1}
+gather_default_limit = 2
+gather_semaphores = {}
+gather_lock = threading.Lock()
 advance_show = ["item_episode_sorting", "item_keep_episodes", "item_delete_episodes", "item_season_display", "item_episode_sorting"]
 all_builders = anidb.builders + anilist.builders + flixpatrol.builders + icheckmovies.builders + imdb.builders + \
                letterboxd.builders + mal.builders + plex.builders + reciperr.builders + tautulli.builders + \
@@ -588,7 +600,7 @@ class CollectionBuilder:
         self.filters = []
         self.has_tmdb_filters = False
         self.has_imdb_filters = False
-        self.found_items = []
+        self.found_items = util.ItemSet()
         self.filtered_items = []
         self.filtered_keys = {}
         self.run_again_movies = []
@@ -596,7 +608,7 @@ class CollectionBuilder:
         self.notification_additions = []
         self.notification_removals = []
         self.items = []
-        self.remove_item_map = {}
+        self.remove_items = util.ItemSet()
         self.schedule = ""
         self.beginning_count = 0
         self.default_percent = 50
@@ -1129,9 +1141,9 @@ class CollectionBuilder:
             if self.obj:
                 self.exists = True
                 if self.sync or self.playlist:
-                    self.remove_item_map = {i.ratingKey: i for i in self.library.get_collection_items(self.obj, self.smart_label_collection)}
+                    self.remove_items = util.ItemSet(self.library.get_collection_items(self.obj, self.smart_label_collection))
                 if not self.smart:
-                    self.beginning_count = len(self.remove_item_map) if self.playlist else self.obj.childCount
+                    self.beginning_count = len(self.remove_items) if self.playlist else self.obj.childCount
         else:
             self.obj = None
             if self.sync:
@@ -2055,6 +2067,40 @@ class CollectionBuilder:
         self.has_tmdb_filters = any([str(k).split(".")[0] in tmdb_filters for f in self.filters for k, v in f])
         self.has_imdb_filters = any([str(k).split(".")[0] in imdb_filters for f in self.filters for k, v in f])
 
+    @property
+    def threads(self):
+        return max(1, self.library.threads // self.config.general["collection_threads"])
+
+    def gather_builders(self):
+        def gather(method, value):
+            provider = gather_builder_providers.get(method, method)
+            with gather_lock:
+                if provider not in gather_semaphores:
+                    gather_semaphores[provider] = threading.Semaphore(gather_limits.get(provider, gather_default_limit))
+            logger.start_buffer()
+            try:
+                with gather_semaphores[provider]:
+                    ids = self.gather_ids(method, value)
+            except Exception as e:
+                return logger.end_buffer(), None, e
+            return logger.end_buffer(), ids, None
+
+        def get_ids(future):
+            records, ids, error = future.result()
+            logger.replay(records)
+            if error:
+                raise error
+            return ids
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            futures = [(method, value, executor.submit(gather, method, value)) for method, value in self.builders]
+            try:
+                for method, value, future in futures:
+                    yield method, value, lambda f=future: get_ids(f)
+            finally:
+                for _, _, future in futures:
+                    future.cancel()
+
     def gather_ids(self, method, value):
         expired = None
         list_key = None
@@ -2116,6 +2162,13 @@ class CollectionBuilder:
             logger.debug(f"{total_ids} IDs Found")
             logger.trace(f"IDs: {ids}")
             logger.debug("")
+            imdb_converted = {}
+            if self.builder_level == "episode" or self.playlist or self.do_missing:
+                imdb_ids = [i for i, t in ids if t == "imdb" and i not in self.ignore_imdb_ids and not any([i in pl.imdb_map for pl in self.libraries])]
+                if imdb_ids:
+                    imdb_converted = self.config.Convert.convert_many(imdb_ids, "imdb", "tmdb", threads=self.threads)
+            tmdb_show_ids = [i for i, t in ids if t == "tmdb_show"]
+            tmdb_show_converted = self.config.Convert.convert_many(tmdb_show_ids, "tmdb", "tvdb", threads=self.threads) if tmdb_show_ids else {}
             for i, input_data in enumerate(ids, 1):
                 input_id, id_type = input_data
                 logger.ghost(f"Parsing ID {i}/{total_ids}")
@@ -2132,7 +2185,9 @@ class CollectionBuilder:
                                 break
                         if not found and (self.builder_level == "episode" or self.playlist or self.do_missing):
                             try:
-                                _id, tmdb_type = self.config.Convert.imdb_to_tmdb(input_id, fail=True)
+                                if input_id not in imdb_converted:
+                                    raise Failed(f"Convert Warning: No TMDb ID Found for IMDb ID: {input_id}")
+                                _id, tmdb_type = imdb_converted[input_id]
                                 if tmdb_type == "episode" and (self.builder_level == "episode" or self.playlist):
                                     try:
                                         tmdb_id, season_num, episode_num = _id.split("_")
@@ -2224,11 +2279,10 @@ class CollectionBuilder:
                 elif id_type in ["tvdb", "tmdb_show", "tvdb_season", "tvdb_episode"]:
                     tvdb_season = None
                     if id_type == "tmdb_show":
-                        try:
-                            tvdb_id = self.config.Convert.tmdb_to_tvdb(input_id, fail=True)
-                        except Failed as e:
-                            logger.warning(e)
+                        if input_id not in tmdb_show_converted:
+                            logger.warning(f"Convert Warning: No TVDb ID Found for TMDb ID: {input_id}")
                             continue
+                        tvdb_id = tmdb_show_converted[input_id]
                     elif id_type == "tvdb_season":
                         tvdb_id, tvdb_season = input_id.split("_")
                         tvdb_id = int(tvdb_id)
@@ -2300,7 +2354,7 @@ class CollectionBuilder:
             logger.info("")
             logger.info("Filtering Builders:")
         filtered_items = []
-        for i, item in enumerate(items, 1):
+        for i, item in enumerate(self.library.prefetch(items) if self.filters and not self.details["only_filter_missing"] else items, 1):
             if not isinstance(item, (Movie, Show, Season, Episode, Artist, Album, Track)):
                 logger.error(f"{self.Type} Error: Item: {item} is an invalid type")
                 continue
@@ -2311,7 +2365,7 @@ class CollectionBuilder:
                 else:
                     current_title = util.item_title(item)
                     if self.check_filters(item, f"{(' ' * (max_length - len(str(i))))}{i}/{total}"):
-                        self.found_items.append(item)
+                        self.found_items.add(item)
                     else:
                         filtered_items.append(item)
                         self.filtered_keys[item.ratingKey] = current_title
@@ -2695,21 +2749,22 @@ class CollectionBuilder:
         logger.separator(f"Adding to {self.name} {self.Type}", space=False, border=False)
         logger.info("")
         name, collection_items = self.library.get_collection_name_and_items(self.obj if self.obj else self.name, self.smart_label_collection)
+        _, unchanged, _ = self.found_items.diff(collection_items)
         total = self.limit if self.limit and len(self.found_items) > self.limit else len(self.found_items)
         spacing = len(str(total)) * 2 + 1
         amount_added = 0
         amount_unchanged = 0
         items_added = []
         for i, item in enumerate(self.found_items, 1):
-            if self.limit and amount_added + self.beginning_count - len([r for _, r in self.remove_item_map.items() if r is not None]) >= self.limit:
+            if self.limit and amount_added + self.beginning_count - len(self.remove_items) >= self.limit:
                 logger.info(f"{self.Type} Limit reached")
                 self.found_items = self.found_items[:i - 1]
                 break
-            current_operation = "=" if item in collection_items else "+"
+            current_operation = "=" if item in unchanged else "+"
             number_text = f"{i}/{total}"
             logger.info(f"{number_text:>{spacing}} | {name} {self.Type} | {current_operation} | {util.item_title(item)}")
-            if item in collection_items:
-                self.remove_item_map[item.ratingKey] = None
+            if item in unchanged:
+                self.remove_items.discard(item)
                 amount_unchanged += 1
             else:
                 items_added.append(item)
@@ -2735,7 +2790,7 @@ class CollectionBuilder:
     def sync_collection(self):
         amount_removed = 0
         items_removed = []
-        items = [item for _, item in self.remove_item_map.items() if item is not None]
+        items = self.remove_items.items()
         if items:
             logger.info("")
             logger.separator(f"Removed from {self.name} {self.Type}", space=False, border=False)
@@ -3025,7 +3080,7 @@ class CollectionBuilder:
 
         tmdb_paths = []
         tvdb_paths = []
-        for item in self.items:
+        for item in self.library.prefetch(self.items):
             item = self.library.reload(item)
             current_labels = [la.tag for la in self.library.item_labels(item)]
             if "item_assets" in self.item_details and self.asset_directory and "Overlay" not in current_labels:
@@ -3350,11 +3405,16 @@ class CollectionBuilder:
                 else:
                     raise Failed(str(e))
             items = self.library.fetchItems(search_data[2])
+        items = list(items)
+        current_positions = {item.ratingKey: i for i, item in enumerate(self.items)}
+        in_place = [i for i, item in enumerate(items) if item.ratingKey in current_positions]
+        keep = {in_place[i] for i in util.longest_increasing_subsequence([current_positions[items[i].ratingKey] for i in in_place])}
+        logger.debug(f"Sort Moves Required: {len(items) - len(keep)} of {len(items)}")
         previous = None
         sort_edit = False
-        for i, item in enumerate(items, 0):
+        for i, item in enumerate(items):
             try:
-                if len(self.items) <= i or item.ratingKey != self.items[i].ratingKey:
+                if i not in keep:
                     text = f"after {util.item_title(previous)}" if previous else "to the beginning"
                     self.library.moveItem(self.obj, item, previous)
                     logger.info(f"Moving {util.item_title(item)} {text}")
@@ -3454,6 +3514,7 @@ class CollectionBuilder:
     def run_collections_again(self):
         self.obj = self.library.get_collection(self.name, force_search=True)
         name, collection_items = self.library.get_collection_name_and_items(self.obj, self.smart_label_collection)
+        collection_items = util.ItemSet(collection_items)
         self.created = False
         rating_keys = []
         amount_added = 0
@@ -3477,6 +3538,7 @@ class CollectionBuilder:
                 if current in collection_items:
                     logger.info(f"{name} {self.Type} | = | {util.item_title(current)}")
                 else:
+                    collection_items.add(current)
                     self.library.alter_collection(current, name, smart_label_collection=self.smart_label_collection)
                     amount_added += 1
                     logger.info(f"{name} {self.Type} | + | {util.item_title(current)}")
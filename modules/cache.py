@@ -1,351 +1,673 @@
-import json, os, random, sqlite3
-from contextlib import closing
+import gzip, json, os, random, re, sqlite3, threading, time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from datetime import datetime, timedelta
 from modules import util
 
 logger = util.logger
 
+schema_version = 2
+write_queue_size = 500
+write_queue_seconds = 5
+refresh_workers = 4
+snapshot_version = 1
+snapshot_tables = {
+    "guids_map": "plex_guid", "imdb_to_tmdb_map": "imdb_id", "imdb_to_tvdb_map2": "imdb_id", "tmdb_to_tvdb_map2": "tmdb_id",
+    "letterboxd_map": "letterboxd_id", "tvdb_map": "tvdb_url", "anime_map": "anidb", "omdb_data3": "imdb_id", "mdb_data4": "key_id",
+    "anidb_data4": "anidb_id", "mal_data2": "mal_id", "tmdb_movie_data": "tmdb_id", "tmdb_show_data": "tmdb_id", "tvdb_data3": "tvdb_id"
+}
+unique_indexes = {
+    "imdb_keywords": ["imdb_id"], "imdb_parental": ["imdb_id"], "overlay_special_text": ["rating_key", "type"],
+    "list_cache": ["list_type", "list_data"], "list_ids": ["list_key", "media_id", "media_type"],
+    "radarr_adds": ["tmdb_id", "library"], "sonarr_adds": ["tvdb_id", "library"],
+    "ergast_race": ["season", "round"], "library_snapshot": ["library", "rating_key"], "testing": ["name"]
+}
+lookup_indexes = [
+    ("imdb_to_tmdb_map", "tmdb_id"), ("imdb_to_tvdb_map2", "tvdb_id"), ("tmdb_to_tvdb_map2", "tvdb_id"),
+    ("anime_map", "anilist"), ("anime_map", "myanimelist"), ("anime_map", "kitsu"),
+    ("guids_map", "expiration_date"), ("imdb_to_tmdb_map", "expiration_date"), ("imdb_to_tvdb_map2", "expiration_date"),
+    ("tmdb_to_tvdb_map2", "expiration_date"), ("omdb_data3", "expiration_date"), ("mdb_data4", "expiration_date"),
+    ("tmdb_movie_data", "expiration_date"), ("tmdb_show_data", "expiration_date")
+]
+
+class QueuedCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, params))
+
 class Cache:
-    def __init__(self, config_path, expiration):
+    def __init__(self, config_path, expiration, refresh_limit=0):
         self.cache_path = f"{os.path.splitext(config_path)[0]}.cache"
         self.expiration = expiration
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self.refresh_limit = refresh_limit
+        self._refresh_pool = None
+        self._refresh_keys = set()
+        self._refresh_counts = Counter()
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._guid_map = {}
+        self._write_queue = []
+        self._write_keys = Counter()
+        self._write_time = None
+        self._write_lock = threading.Lock()
+        self._flush_lock = threading.RLock()
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
-                cursor.execute("SELECT count(name) FROM sqlite_master WHERE type='table' AND name='guid_map'")
-                if cursor.fetchone()[0] == 0:
-                    logger.info(f"Initializing cache database at {self.cache_path}")
-                else:
+                cursor.execute("PRAGMA user_version")
+                version = cursor.fetchone()[0]
+                if version == schema_version:
                     logger.info(f"Using cache database at {self.cache_path}")
-                cursor.execute("DROP TABLE IF EXISTS guids")
-                cursor.execute("DROP TABLE IF EXISTS guid_map")
-                cursor.execute("DROP TABLE IF EXISTS imdb_to_tvdb_map")
-                cursor.execute("DROP TABLE IF EXISTS tmdb_to_tvdb_map")
-                cursor.execute("DROP TABLE IF EXISTS imdb_map")
-                cursor.execute("DROP TABLE IF EXISTS mdb_data")
-                cursor.execute("DROP TABLE IF EXISTS mdb_data2")
-                cursor.execute("DROP TABLE IF EXISTS mdb_data3")
-                cursor.execute("DROP TABLE IF EXISTS omdb_data")
-                cursor.execute("DROP TABLE IF EXISTS omdb_data2")
-                cursor.execute("DROP TABLE IF EXISTS tvdb_data")
-                cursor.execute("DROP TABLE IF EXISTS tvdb_data2")
-                cursor.execute("DROP TABLE IF EXISTS overlay_ratings")
-                cursor.execute("DROP TABLE IF EXISTS anidb_data")
-                cursor.execute("DROP TABLE IF EXISTS anidb_data2")
-                cursor.execute("DROP TABLE IF EXISTS anidb_data3")
-                cursor.execute("DROP TABLE IF EXISTS mal_data")
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS guids_map (
-                    key INTEGER PRIMARY KEY,
-                    plex_guid TEXT UNIQUE,
-                    t_id TEXT,
-                    imdb_id TEXT,
-                    media_type TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS imdb_to_tmdb_map (
-                    key INTEGER PRIMARY KEY,
-                    imdb_id TEXT UNIQUE,
-                    tmdb_id TEXT,
-                    media_type TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS imdb_to_tvdb_map2 (
-                    key INTEGER PRIMARY KEY,
-                    imdb_id TEXT UNIQUE,
-                    tvdb_id TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS tmdb_to_tvdb_map2 (
-                    key INTEGER PRIMARY KEY,
-                    tmdb_id TEXT UNIQUE,
-                    tvdb_id TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS letterboxd_map (
-                    key INTEGER PRIMARY KEY,
-                    letterboxd_id TEXT UNIQUE,
-                    tmdb_id TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS omdb_data3 (
-                    key INTEGER PRIMARY KEY,
-                    imdb_id TEXT UNIQUE,
-                    title TEXT,
-                    year INTEGER,
-                    released TEXT,
-                    content_rating TEXT,
-                    genres TEXT,
-                    imdb_rating REAL,
-                    imdb_votes INTEGER,
-                    metacritic_rating INTEGER,
-                    type TEXT,
-                    series_id TEXT,
-                    season_num INTEGER,
-                    episode_num INTEGER,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS mdb_data4 (
-                    key INTEGER PRIMARY KEY,
-                    key_id TEXT UNIQUE,
-                    title TEXT,
-                    year INTEGER,
-                    released TEXT,
-                    type TEXT,
-                    imdbid TEXT,
-                    traktid INTEGER,
-                    tmdbid INTEGER,
-                    score INTEGER,
-                    average INTEGER,
-                    imdb_rating REAL,
-                    metacritic_rating INTEGER,
-                    metacriticuser_rating REAL,
-                    trakt_rating INTEGER,
-                    tomatoes_rating INTEGER,
-                    tomatoesaudience_rating INTEGER,
-                    tmdb_rating INTEGER,
-                    letterboxd_rating REAL,
-                    myanimelist_rating REAL,
-                    commonsense TEXT,
-                    certification TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS anidb_data4 (
-                    key INTEGER PRIMARY KEY,
-                    anidb_id INTEGER UNIQUE,
-                    main_title TEXT,
-                    titles TEXT,
-                    studio TEXT,
-                    rating REAL,
-                    average REAL,
-                    score REAL,
-                    released TEXT,
-                    tags TEXT,
-                    mal_id INTEGER,
-                    imdb_id TEXT,
-                    tmdb_id INTEGER,
-                    tmdb_type TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS mal_data2 (
-                    key INTEGER PRIMARY KEY,
-                    mal_id INTEGER UNIQUE,
-                    title TEXT,
-                    title_english TEXT,
-                    title_japanese TEXT,
-                    status TEXT,
-                    airing TEXT,
-                    aired TEXT,
-                    rating TEXT,
-                    score REAL,
-                    rank INTEGER,
-                    popularity TEXT,
-                    genres TEXT,
-                    studio TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS tmdb_movie_data (
-                    key INTEGER PRIMARY KEY,
-                    tmdb_id INTEGER UNIQUE,
-                    title TEXT,
-                    original_title TEXT,
-                    studio TEXT,
-                    overview TEXT,
-                    tagline TEXT,
-                    imdb_id TEXT,
-                    poster_url TEXT,
-                    backdrop_url TEXT,
-                    vote_count INTEGER,
-                    vote_average REAL,
-                    language_iso TEXT,
-                    language_name TEXT,
-                    genres TEXT,
-                    keywords TEXT,
-                    release_date TEXT,
-                    collection_id INTEGER,
-                    collection_name TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS tmdb_show_data (
-                    key INTEGER PRIMARY KEY,
-                    tmdb_id INTEGER UNIQUE,
-                    title TEXT,
-                    original_title TEXT,
-                    studio TEXT,
-                    overview TEXT,
-                    tagline TEXT,
-                    imdb_id TEXT,
-                    poster_url TEXT,
-                    backdrop_url TEXT,
-                    vote_count INTEGER,
-                    vote_average REAL,
-                    language_iso TEXT,
-                    language_name TEXT,
-                    genres TEXT,
-                    keywords TEXT,
-                    first_air_date TEXT,
-                    last_air_date TEXT,
-                    status TEXT,
-                    type TEXT,
-                    tvdb_id INTEGER,
-                    countries TEXT,
-                    seasons TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS tvdb_data3 (
-                    key INTEGER PRIMARY KEY,
-                    tvdb_id INTEGER UNIQUE,
-                    type TEXT,
-                    title TEXT,
-                    summary TEXT,
-                    poster_url TEXT,
-                    background_url TEXT,
-                    release_date TEXT,
-                    genres TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS tvdb_map (
-                    key INTEGER PRIMARY KEY,
-                    tvdb_url TEXT UNIQUE,
-                    tvdb_id INTEGER,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS anime_map (
-                    key INTEGER PRIMARY KEY,
-                    anidb TEXT UNIQUE,
-                    anilist TEXT,
-                    myanimelist TEXT,
-                    kitsu TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS image_maps (
-                    key INTEGER PRIMARY KEY,
-                    library TEXT UNIQUE)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS radarr_adds (
-                    key INTEGER PRIMARY KEY,
-                    tmdb_id TEXT,
-                    library TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS sonarr_adds (
-                    key INTEGER PRIMARY KEY,
-                    tvdb_id TEXT,
-                    library TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS list_cache (
-                    key INTEGER PRIMARY KEY,
-                    list_type TEXT,
-                    list_data TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS list_ids (
-                    key INTEGER PRIMARY KEY,
-                    list_key TEXT,
-                    media_id TEXT,
-                    media_type TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS imdb_keywords (
-                    key INTEGER PRIMARY KEY,
-                    imdb_id TEXT,
-                    keywords TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS imdb_parental (
-                    key INTEGER PRIMARY KEY,
-                    imdb_id TEXT,
-                    nudity TEXT,
-                    violence TEXT,
-                    profanity TEXT,
-                    alcohol TEXT,
-                    frightening TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS ergast_race (
-                    key INTEGER PRIMARY KEY,
-                    season INTEGER,
-                    round INTEGER,
-                    name TEXT,
-                    date TEXT,
-                    expiration_date TEXT)"""
-                )
-                cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS overlay_special_text (
-                    key INTEGER PRIMARY KEY,
-                    rating_key INTEGER,
-                    type TEXT,
-                    text TEXT)"""
-                )
+                else:
+                    cursor.execute("SELECT count(name) FROM sqlite_master WHERE type='table' AND name='guids_map'")
+                    if cursor.fetchone()[0] == 0:
+                        logger.info(f"Initializing cache database at {self.cache_path}")
+                    else:
+                        logger.info(f"Updating cache database at {self.cache_path} to version {schema_version}")
+                    self._migrate(cursor)
+                    cursor.execute(f"PRAGMA user_version = {schema_version}")
+
+    def _migrate(self, cursor):
+        cursor.execute("DROP TABLE IF EXISTS guids")
+        cursor.execute("DROP TABLE IF EXISTS guid_map")
+        cursor.execute("DROP TABLE IF EXISTS imdb_to_tvdb_map")
+        cursor.execute("DROP TABLE IF EXISTS tmdb_to_tvdb_map")
+        cursor.execute("DROP TABLE IF EXISTS imdb_map")
+        cursor.execute("DROP TABLE IF EXISTS mdb_data")
+        cursor.execute("DROP TABLE IF EXISTS mdb_data2")
+        cursor.execute("DROP TABLE IF EXISTS mdb_data3")
+        cursor.execute("DROP TABLE IF EXISTS omdb_data")
+        cursor.execute("DROP TABLE IF EXISTS omdb_data2")
+        cursor.execute("DROP TABLE IF EXISTS tvdb_data")
+        cursor.execute("DROP TABLE IF EXISTS tvdb_data2")
+        cursor.execute("DROP TABLE IF EXISTS overlay_ratings")
+        cursor.execute("DROP TABLE IF EXISTS anidb_data")
+        cursor.execute("DROP TABLE IF EXISTS anidb_data2")
+        cursor.execute("DROP TABLE IF EXISTS anidb_data3")
+        cursor.execute("DROP TABLE IF EXISTS mal_data")
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS guids_map (
+            key INTEGER PRIMARY KEY,
+            plex_guid TEXT UNIQUE,
+            t_id TEXT,
+            imdb_id TEXT,
+            media_type TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS imdb_to_tmdb_map (
+            key INTEGER PRIMARY KEY,
+            imdb_id TEXT UNIQUE,
+            tmdb_id TEXT,
+            media_type TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS imdb_to_tvdb_map2 (
+            key INTEGER PRIMARY KEY,
+            imdb_id TEXT UNIQUE,
+            tvdb_id TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS tmdb_to_tvdb_map2 (
+            key INTEGER PRIMARY KEY,
+            tmdb_id TEXT UNIQUE,
+            tvdb_id TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS letterboxd_map (
+            key INTEGER PRIMARY KEY,
+            letterboxd_id TEXT UNIQUE,
+            tmdb_id TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS omdb_data3 (
+            key INTEGER PRIMARY KEY,
+            imdb_id TEXT UNIQUE,
+            title TEXT,
+            year INTEGER,
+            released TEXT,
+            content_rating TEXT,
+            genres TEXT,
+            imdb_rating REAL,
+            imdb_votes INTEGER,
+            metacritic_rating INTEGER,
+            type TEXT,
+            series_id TEXT,
+            season_num INTEGER,
+            episode_num INTEGER,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS mdb_data4 (
+            key INTEGER PRIMARY KEY,
+            key_id TEXT UNIQUE,
+            title TEXT,
+            year INTEGER,
+            released TEXT,
+            type TEXT,
+            imdbid TEXT,
+            traktid INTEGER,
+            tmdbid INTEGER,
+            score INTEGER,
+            average INTEGER,
+            imdb_rating REAL,
+            metacritic_rating INTEGER,
+            metacriticuser_rating REAL,
+            trakt_rating INTEGER,
+            tomatoes_rating INTEGER,
+            tomatoesaudience_rating INTEGER,
+            tmdb_rating INTEGER,
+            letterboxd_rating REAL,
+            myanimelist_rating REAL,
+            commonsense TEXT,
+            certification TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS anidb_data4 (
+            key INTEGER PRIMARY KEY,
+            anidb_id INTEGER UNIQUE,
+            main_title TEXT,
+            titles TEXT,
+            studio TEXT,
+            rating REAL,
+            average REAL,
+            score REAL,
+            released TEXT,
+            tags TEXT,
+            mal_id INTEGER,
+            imdb_id TEXT,
+            tmdb_id INTEGER,
+            tmdb_type TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS mal_data2 (
+            key INTEGER PRIMARY KEY,
+            mal_id INTEGER UNIQUE,
+            title TEXT,
+            title_english TEXT,
+            title_japanese TEXT,
+            status TEXT,
+            airing TEXT,
+            aired TEXT,
+            rating TEXT,
+            score REAL,
+            rank INTEGER,
+            popularity TEXT,
+            genres TEXT,
+            studio TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS tmdb_movie_data (
+            key INTEGER PRIMARY KEY,
+            tmdb_id INTEGER UNIQUE,
+            title TEXT,
+            original_title TEXT,
+            studio TEXT,
+            overview TEXT,
+            tagline TEXT,
+            imdb_id TEXT,
+            poster_url TEXT,
+            backdrop_url TEXT,
+            vote_count INTEGER,
+            vote_average REAL,
+            language_iso TEXT,
+            language_name TEXT,
+            genres TEXT,
+            keywords TEXT,
+            release_date TEXT,
+            collection_id INTEGER,
+            collection_name TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS tmdb_show_data (
+            key INTEGER PRIMARY KEY,
+            tmdb_id INTEGER UNIQUE,
+            title TEXT,
+            original_title TEXT,
+            studio TEXT,
+            overview TEXT,
+            tagline TEXT,
+            imdb_id TEXT,
+            poster_url TEXT,
+            backdrop_url TEXT,
+            vote_count INTEGER,
+            vote_average REAL,
+            language_iso TEXT,
+            language_name TEXT,
+            genres TEXT,
+            keywords TEXT,
+            first_air_date TEXT,
+            last_air_date TEXT,
+            status TEXT,
+            type TEXT,
+            tvdb_id INTEGER,
+            countries TEXT,
+            seasons TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS tvdb_data3 (
+            key INTEGER PRIMARY KEY,
+            tvdb_id INTEGER UNIQUE,
+            type TEXT,
+            title TEXT,
+            summary TEXT,
+            poster_url TEXT,
+            background_url TEXT,
+            release_date TEXT,
+            genres TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS tvdb_map (
+            key INTEGER PRIMARY KEY,
+            tvdb_url TEXT UNIQUE,
+            tvdb_id INTEGER,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS anime_map (
+            key INTEGER PRIMARY KEY,
+            anidb TEXT UNIQUE,
+            anilist TEXT,
+            myanimelist TEXT,
+            kitsu TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS image_maps (
+            key INTEGER PRIMARY KEY,
+            library TEXT UNIQUE)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS radarr_adds (
+            key INTEGER PRIMARY KEY,
+            tmdb_id TEXT,
+            library TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS sonarr_adds (
+            key INTEGER PRIMARY KEY,
+            tvdb_id TEXT,
+            library TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS list_cache (
+            key INTEGER PRIMARY KEY,
+            list_type TEXT,
+            list_data TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS list_ids (
+            key INTEGER PRIMARY KEY,
+            list_key TEXT,
+            media_id TEXT,
+            media_type TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS imdb_keywords (
+            key INTEGER PRIMARY KEY,
+            imdb_id TEXT,
+            keywords TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS imdb_parental (
+            key INTEGER PRIMARY KEY,
+            imdb_id TEXT,
+            nudity TEXT,
+            violence TEXT,
+            profanity TEXT,
+            alcohol TEXT,
+            frightening TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS ergast_race (
+            key INTEGER PRIMARY KEY,
+            season INTEGER,
+            round INTEGER,
+            name TEXT,
+            date TEXT,
+            expiration_date TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS overlay_special_text (
+            key INTEGER PRIMARY KEY,
+            rating_key INTEGER,
+            type TEXT,
+            text TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS library_snapshot (
+            key INTEGER PRIMARY KEY,
+            library TEXT,
+            rating_key INTEGER,
+            guid TEXT,
+            title TEXT,
+            type TEXT,
+            updated_at INTEGER)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS testing (
+            key INTEGER PRIMARY KEY,
+            name TEXT,
+            value1 TEXT,
+            value2 TEXT,
+            success TEXT)"""
+        )
+        cursor.execute("SELECT count(name) FROM sqlite_master WHERE type='table' AND name='image_map'")
+        if cursor.fetchone()[0] > 0:
+            cursor.execute("SELECT DISTINCT library FROM image_map")
+            for library in cursor.fetchall():
+                table_name = self.get_image_table_name(library["library"])
                 cursor.execute(
-                    """CREATE TABLE IF NOT EXISTS testing (
-                    key INTEGER PRIMARY KEY,
-                    name TEXT,
-                    value1 TEXT,
-                    value2 TEXT,
-                    success TEXT)"""
+                    f"""INSERT OR REPLACE INTO {table_name}(rating_key, location, compare, overlay)
+                    SELECT rating_key, location, compare, overlay FROM image_map WHERE library = ? AND type = 'poster'""",
+                    (library["library"],)
                 )
-                cursor.execute("SELECT count(name) FROM sqlite_master WHERE type='table' AND name='image_map'")
-                if cursor.fetchone()[0] > 0:
-                    cursor.execute(f"SELECT DISTINCT library FROM image_map")
-                    for library in cursor.fetchall():
-                        table_name = self.get_image_table_name(library["library"])
-                        cursor.execute(f"SELECT DISTINCT * FROM image_map WHERE library='{library['library']}'")
-                        for row in cursor.fetchall():
-                            if row["type"] == "poster":
-                                final_table = table_name if row["type"] == "poster" else f"{table_name}_backgrounds"
-                                self.update_image_map(row["rating_key"], final_table, row["location"], row["compare"], overlay=row["overlay"])
-                    cursor.execute("DROP TABLE IF EXISTS image_map")
+            cursor.execute("DROP TABLE IF EXISTS image_map")
+        self._create_indexes(cursor)
 
-    def query_guid_map(self, plex_guid):
-        id_to_return = None
-        imdb_id = None
-        media_type = None
-        expired = None
-        with sqlite3.connect(self.cache_path) as connection:
+    def _create_indexes(self, cursor):
+        for table, columns in unique_indexes.items():
+            cursor.execute(f"DELETE FROM {table} WHERE key NOT IN (SELECT MAX(key) FROM {table} GROUP BY {', '.join(columns)})")
+            if cursor.rowcount > 0:
+                logger.info(f"Removed {cursor.rowcount} Duplicate Rows from {table}")
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_{'_'.join(columns)}_idx ON {table}({', '.join(columns)})")
+        for table, column in lookup_indexes:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_{column}_idx ON {table}({column})")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.cache_path, timeout=30, cached_statements=256, check_same_thread=False)
             connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA cache_size=-16000")
+            connection.execute("PRAGMA temp_store=MEMORY")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _queue(self, table, *keys):
+        cursor = QueuedCursor()
+        yield cursor
+        with self._write_lock:
+            if not self._write_queue:
+                self._write_time = time.time()
+            self._write_queue.append((cursor.statements, [(table, str(k)) for k in keys]))
+            self._write_keys.update([(table, str(k)) for k in keys])
+            full = len(self._write_queue) >= write_queue_size or time.time() - self._write_time >= write_queue_seconds
+        if full:
+            self.flush()
+
+    def _flush_pending(self, table, key):
+        with self._write_lock:
+            pending = (table, str(key)) in self._write_keys
+            if not pending and self._write_time is not None:
+                pending = time.time() - self._write_time >= write_queue_seconds
+        if pending:
+            self.flush()
+
+    def _execute_queue(self, queue):
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                batch = []
+                for statements, _ in queue + [([], [])]:
+                    if batch and [sql for sql, _ in statements] != [sql for sql, _ in batch[0]]:
+                        for i, (sql, _) in enumerate(batch[0]):
+                            cursor.executemany(sql, [b[i][1] for b in batch])
+                        batch = []
+                    batch.append(statements)
+
+    def _transient(self, error):
+        return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
+
+    def flush(self):
+        with self._flush_lock:
+            with self._write_lock:
+                queue = self._write_queue
+                self._write_queue = []
+                self._write_time = None
+            if not queue:
+                return
+            retry = []
+            try:
+                self._execute_queue(queue)
+            except sqlite3.Error as e:
+                if self._transient(e):
+                    retry = queue
+                else:
+                    for entry in queue:
+                        try:
+                            self._execute_queue([entry])
+                        except sqlite3.Error as ee:
+                            if self._transient(ee):
+                                retry.append(entry)
+                            else:
+                                logger.error(f"Cache Error: Dropped Queued Write for {', '.join([f'{t}: {k}' for t, k in entry[1]])}: {ee}")
+            with self._write_lock:
+                if retry:
+                    self._write_queue = retry + self._write_queue
+                    self._write_time = time.time()
+                for entry in queue:
+                    if not any(entry is r for r in retry):
+                        self._write_keys.subtract(entry[1])
+                self._write_keys = +self._write_keys
+            if retry:
+                logger.debug(f"Cache: Database Busy, Retrying {len(retry)} Queued Writes Later")
+            else:
+                logger.trace(f"Cache: Flushed {len(queue)} Queued Writes")
+
+    def revalidate(self, provider, key, refresh):
+        if not self.refresh_limit:
+            return False
+        with self._refresh_lock:
+            if (provider, key) not in self._refresh_keys and self._refresh_counts[provider] < self.refresh_limit:
+                self._refresh_keys.add((provider, key))
+                self._refresh_counts[provider] += 1
+                if self._refresh_pool is None:
+                    self._refresh_pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="CacheRefresh")
+                self._refresh_pool.submit(self._refresh, provider, key, refresh)
+        return True
+
+    def _refresh(self, provider, key, refresh):
+        try:
+            refresh()
+        except Exception as e:
+            logger.debug(f"Cache: {provider} Background Refresh of {key} Failed: {e}")
+
+    def close(self):
+        with self._refresh_lock:
+            pool = self._refresh_pool
+            self._refresh_pool = None
+        if pool:
+            logger.info("Waiting for Background Cache Refreshes to Finish")
+            pool.shutdown(wait=True)
+            logger.info(f"Background Cache Refreshes: {', '.join([f'{k}: {v}' for k, v in self._refresh_counts.items()])}")
+        self.flush()
+        if self._write_queue:
+            logger.error(f"Cache Error: {len(self._write_queue)} Queued Writes Lost, Database Busy")
+        with self._connections_lock:
+            for connection in self._connections:
+                try:
+                    connection.execute("PRAGMA optimize")
+                    connection.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+    def maintenance(self, expiration=None):
+        self.flush()
+        cutoff = (datetime.now() - timedelta(days=max(expiration or 0, self.expiration))).strftime("%Y-%m-%d")
+        start_size = self._file_size()
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+                tables = [row["name"] for row in cursor.fetchall()]
+                for table in tables:
+                    cursor.execute(f"PRAGMA table_info({table})")
+                    if table != "list_cache" and "expiration_date" in [row["name"] for row in cursor.fetchall()]:
+                        cursor.execute(f"DELETE FROM {table} WHERE expiration_date IS NULL OR expiration_date < ?", (cutoff,))
+                        if cursor.rowcount > 0:
+                            logger.info(f"Removed {cursor.rowcount} Expired Rows from {table}")
+                image_tables = [f"image_map_{row['key']}" for row in cursor.execute("SELECT key FROM image_maps").fetchall()]
+                for table in tables:
+                    if table.startswith("image_map_") and re.sub("_(backgrounds|overlays)$", "", table) not in image_tables:
+                        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                        logger.info(f"Removed Orphaned Table {table}")
+                cursor.execute("DELETE FROM list_ids WHERE list_key NOT IN (SELECT CAST(key AS TEXT) FROM list_cache)")
+                if cursor.rowcount > 0:
+                    logger.info(f"Removed {cursor.rowcount} Orphaned Rows from list_ids")
+                self._create_indexes(cursor)
+        connection.execute("VACUUM")
+        connection.execute("ANALYZE")
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.size_report()
+        logger.info(f"Cache Size: {start_size / 1048576:.2f} MB -> {self._file_size() / 1048576:.2f} MB")
+
+    def size_report(self):
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+                tables = [row["name"] for row in cursor.fetchall()]
+                sizes = {}
+                try:
+                    cursor.execute("SELECT name, SUM(pgsize) AS size FROM dbstat GROUP BY name")
+                    sizes = {row["name"]: row["size"] for row in cursor.fetchall()}
+                except sqlite3.OperationalError:
+                    pass
+                longest = max([len(t) for t in tables] + [5])
+                logger.info("")
+                logger.info(f"{'Table':<{longest}} |    Rows    |    Bytes    ")
+                logger.separator(f"{logger.separating_character * longest}|{logger.separating_character * 12}|{logger.separating_character * 13}", space=False, border=False, side_space=False, left=True)
+                for table in tables:
+                    cursor.execute(f"SELECT count(*) FROM {table}")
+                    rows = cursor.fetchone()[0]
+                    logger.info(f"{table:<{longest}} | {rows:>10} | {sizes[table] if table in sizes else 'N/A':>11}")
+                logger.info("")
+
+    def _file_size(self):
+        return sum([os.path.getsize(f) for f in [self.cache_path, f"{self.cache_path}-wal"] if os.path.exists(f)])
+
+    def _columns(self, cursor, table):
+        cursor.execute(f"PRAGMA table_info({table})")
+        return [row["name"] for row in cursor.fetchall() if row["name"] != "key"]
+
+    def export_snapshot(self, path):
+        self.flush()
+        snapshot = {"version": snapshot_version, "schema_version": schema_version, "created": datetime.now().strftime("%Y-%m-%d"), "tables": {}}
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                for table in snapshot_tables:
+                    columns = self._columns(cursor, table)
+                    cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+                    snapshot["tables"][table] = {"columns": columns, "rows": [list(row) for row in cursor.fetchall()]}
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            json.dump(snapshot, handle, separators=(",", ":"))
+        return {table: len(data["rows"]) for table, data in snapshot["tables"].items()}
+
+    def import_snapshot(self, path):
+        if not os.path.exists(path):
+            raise util.Failed(f"Cache Error: Snapshot not found at {os.path.abspath(path)}")
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                snapshot = json.load(handle)
+        except (OSError, ValueError) as e:
+            raise util.Failed(f"Cache Error: Snapshot at {os.path.abspath(path)} could not be read: {e}")
+        if not isinstance(snapshot, dict) or "version" not in snapshot or "tables" not in snapshot:
+            raise util.Failed(f"Cache Error: {os.path.abspath(path)} is not a cache snapshot")
+        if snapshot["version"] > snapshot_version:
+            raise util.Failed(f"Cache Error: Snapshot version {snapshot['version']} is newer than the supported version {snapshot_version}")
+        self.flush()
+        merged = {}
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                for table, key_column in snapshot_tables.items():
+                    if table not in snapshot["tables"]:
+                        continue
+                    data = snapshot["tables"][table]
+                    existing = self._columns(cursor, table)
+                    columns = [c for c in data["columns"] if c in existing]
+                    if key_column not in columns or "expiration_date" not in columns:
+                        continue
+                    indexes = [data["columns"].index(c) for c in columns]
+                    cursor.execute(f"DROP TABLE IF EXISTS temp.snapshot_{table}")
+                    cursor.execute(f"CREATE TEMP TABLE snapshot_{table} AS SELECT {', '.join(columns)} FROM {table} WHERE 0")
+                    cursor.executemany(
+                        f"INSERT INTO snapshot_{table}({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})",
+                        [[row[i] for i in indexes] for row in data["rows"]]
+                    )
+                    cursor.execute(
+                        f"""INSERT OR REPLACE INTO {table}({', '.join(columns)})
+                        SELECT {', '.join([f's.{c}' for c in columns])} FROM snapshot_{table} s
+                        WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{key_column} = s.{key_column} AND t.expiration_date >= s.expiration_date)"""
+                    )
+                    merged[table] = (len(data["rows"]), cursor.rowcount)
+                    cursor.execute(f"DROP TABLE snapshot_{table}")
+        self._guid_map = {}
+        return merged
+
+    def preload_guid_map(self, plex_guids):
+        self.flush()
+        self._guid_map = {g: (None, None, None, None) for g in plex_guids}
+        plex_guids = list(self._guid_map)
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                for i in range(0, len(plex_guids), 500):
+                    chunk = plex_guids[i:i + 500]
+                    cursor.execute(f"SELECT * FROM guids_map WHERE plex_guid IN ({', '.join(['?'] * len(chunk))})", chunk)
+                    for row in cursor.fetchall():
+                        self._guid_map[row["plex_guid"]] = self._guid_map_row(row)
+        return len([g for g, v in self._guid_map.items() if v[0] or v[1]])
+
+    def _guid_map_row(self, row):
+        time_between_insertion = datetime.now() - datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+        id_to_return = util.get_list(row["t_id"], int_list=True)
+        imdb_id = util.get_list(row["imdb_id"])
+        return id_to_return, imdb_id, row["media_type"], time_between_insertion.days > self.expiration
+
+    def query_guid_map(self, plex_guid):
+        if plex_guid in self._guid_map:
+            return self._guid_map[plex_guid]
+        self._flush_pending("guids_map", plex_guid)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"SELECT * FROM guids_map WHERE plex_guid = ?", (plex_guid,))
                 row = cursor.fetchone()
                 if row:
-                    time_between_insertion = datetime.now() - datetime.strptime(row["expiration_date"], "%Y-%m-%d")
-                    id_to_return = util.get_list(row["t_id"], int_list=True)
-                    imdb_id = util.get_list(row["imdb_id"])
-                    media_type = row["media_type"]
-                    expired = time_between_insertion.days > self.expiration
-        return id_to_return, imdb_id, media_type, expired
+                    return self._guid_map_row(row)
+        return None, None, None, None
 
     def update_guid_map(self, plex_guid, t_id, imdb_id, expired, media_type):
+        self._guid_map.pop(plex_guid, None)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, self.expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO guids_map(plex_guid) VALUES(?)", (plex_guid,))
-                if media_type is None:
-                    sql = f"UPDATE guids_map SET t_id = ?, imdb_id = ?, expiration_date = ? WHERE plex_guid = ?"
-                    cursor.execute(sql, (t_id, imdb_id, expiration_date.strftime("%Y-%m-%d"), plex_guid))
-                else:
-                    sql = f"UPDATE guids_map SET t_id = ?, imdb_id = ?, expiration_date = ?, media_type = ? WHERE plex_guid = ?"
-                    cursor.execute(sql, (t_id, imdb_id, expiration_date.strftime("%Y-%m-%d"), media_type, plex_guid))
+        with self._queue("guids_map", plex_guid) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO guids_map(plex_guid) VALUES(?)", (plex_guid,))
+            if media_type is None:
+                sql = f"UPDATE guids_map SET t_id = ?, imdb_id = ?, expiration_date = ? WHERE plex_guid = ?"
+                cursor.execute(sql, (t_id, imdb_id, expiration_date.strftime("%Y-%m-%d"), plex_guid))
+            else:
+                sql = f"UPDATE guids_map SET t_id = ?, imdb_id = ?, expiration_date = ?, media_type = ? WHERE plex_guid = ?"
+                cursor.execute(sql, (t_id, imdb_id, expiration_date.strftime("%Y-%m-%d"), media_type, plex_guid))
 
     def query_imdb_to_tmdb_map(self, _id, imdb=True, media_type=None, return_type=False):
         from_id = "imdb_id" if imdb else "tmdb_id"
@@ -371,6 +693,36 @@ class Cache:
     def update_tmdb_to_tvdb_map(self, expired, tmdb_id, tvdb_id):
         self._update_map("tmdb_to_tvdb_map2", "tmdb_id", tmdb_id, "tvdb_id", tvdb_id, expired)
 
+    def load_crosswalk(self):
+        self.flush()
+        crosswalk = {"imdb_to_tmdb": {}, "tmdb_to_imdb": {}, "imdb_to_tvdb": {}, "tvdb_to_imdb": {}, "tmdb_to_tvdb": {}, "tvdb_to_tmdb": {}}
+        cutoff = (datetime.now() - timedelta(days=self.expiration)).strftime("%Y-%m-%d")
+
+        def cast(value):
+            if "_" in str(value):
+                return value
+            try:
+                return int(value)
+            except ValueError:
+                return value
+
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT * FROM imdb_to_tmdb_map WHERE tmdb_id IS NOT NULL AND expiration_date >= ?", (cutoff,))
+                for row in cursor.fetchall():
+                    crosswalk["imdb_to_tmdb"][row["imdb_id"]] = (cast(row["tmdb_id"]), row["media_type"])
+                    if row["media_type"] == "movie":
+                        crosswalk["tmdb_to_imdb"][cast(row["tmdb_id"])] = row["imdb_id"]
+                cursor.execute("SELECT * FROM imdb_to_tvdb_map2 WHERE tvdb_id IS NOT NULL AND expiration_date >= ?", (cutoff,))
+                for row in cursor.fetchall():
+                    crosswalk["imdb_to_tvdb"][row["imdb_id"]] = cast(row["tvdb_id"])
+                    crosswalk["tvdb_to_imdb"][cast(row["tvdb_id"])] = row["imdb_id"]
+                cursor.execute("SELECT * FROM tmdb_to_tvdb_map2 WHERE tvdb_id IS NOT NULL AND expiration_date >= ?", (cutoff,))
+                for row in cursor.fetchall():
+                    crosswalk["tmdb_to_tvdb"][cast(row["tmdb_id"])] = cast(row["tvdb_id"])
+                    crosswalk["tvdb_to_tmdb"][cast(row["tvdb_id"])] = cast(row["tmdb_id"])
+        return crosswalk
+
     def query_letterboxd_map(self, letterboxd_id):
         return self._query_map("letterboxd_map", letterboxd_id, "letterboxd_id", "tmdb_id")
 
@@ -381,8 +733,8 @@ class Cache:
         id_to_return = None
         expired = None
         out_type = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending(map_name, _id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 if media_type is None:
                     cursor.execute(f"SELECT * FROM {map_name} WHERE {from_id} = ?", (_id,))
@@ -408,22 +760,20 @@ class Cache:
 
     def _update_map(self, map_name, val1_name, val1, val2_name, val2, expired, media_type=None):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, self.expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO {map_name}({val1_name}) VALUES(?)", (val1,))
-                if media_type is None:
-                    sql = f"UPDATE {map_name} SET {val2_name} = ?, expiration_date = ? WHERE {val1_name} = ?"
-                    cursor.execute(sql, (val2, expiration_date.strftime("%Y-%m-%d"), val1))
-                else:
-                    sql = f"UPDATE {map_name} SET {val2_name} = ?, expiration_date = ?, media_type = ? WHERE {val1_name} = ?"
-                    cursor.execute(sql, (val2, expiration_date.strftime("%Y-%m-%d"), media_type, val1))
+        with self._queue(map_name, val1, val2) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO {map_name}({val1_name}) VALUES(?)", (val1,))
+            if media_type is None:
+                sql = f"UPDATE {map_name} SET {val2_name} = ?, expiration_date = ? WHERE {val1_name} = ?"
+                cursor.execute(sql, (val2, expiration_date.strftime("%Y-%m-%d"), val1))
+            else:
+                sql = f"UPDATE {map_name} SET {val2_name} = ?, expiration_date = ?, media_type = ? WHERE {val1_name} = ?"
+                cursor.execute(sql, (val2, expiration_date.strftime("%Y-%m-%d"), media_type, val1))
 
     def query_omdb(self, imdb_id, expiration):
         omdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("omdb_data3", imdb_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM omdb_data3 WHERE imdb_id = ?", (imdb_id,))
                 row = cursor.fetchone()
@@ -449,23 +799,21 @@ class Cache:
 
     def update_omdb(self, expired, omdb, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO omdb_data3(imdb_id) VALUES(?)", (omdb.imdb_id,))
-                update_sql = "UPDATE omdb_data3 SET title = ?, year = ?, released = ?, content_rating = ?, genres = ?, " \
-                             "imdb_rating = ?, imdb_votes = ?, metacritic_rating = ?, type = ?, series_id = ?, " \
-                             "season_num = ?, episode_num = ?, expiration_date = ? WHERE imdb_id = ?"
-                cursor.execute(update_sql, (
-                    omdb.title, omdb.year, omdb.released.strftime("%d %b %Y") if omdb.released else None, omdb.content_rating,
-                    omdb.genres_str, omdb.imdb_rating, omdb.imdb_votes, omdb.metacritic_rating, omdb.type, omdb.series_id,
-                    omdb.season_num, omdb.episode_num, expiration_date.strftime("%Y-%m-%d"), omdb.imdb_id))
+        with self._queue("omdb_data3", omdb.imdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO omdb_data3(imdb_id) VALUES(?)", (omdb.imdb_id,))
+            update_sql = "UPDATE omdb_data3 SET title = ?, year = ?, released = ?, content_rating = ?, genres = ?, " \
+                         "imdb_rating = ?, imdb_votes = ?, metacritic_rating = ?, type = ?, series_id = ?, " \
+                         "season_num = ?, episode_num = ?, expiration_date = ? WHERE imdb_id = ?"
+            cursor.execute(update_sql, (
+                omdb.title, omdb.year, omdb.released.strftime("%d %b %Y") if omdb.released else None, omdb.content_rating,
+                omdb.genres_str, omdb.imdb_rating, omdb.imdb_votes, omdb.metacritic_rating, omdb.type, omdb.series_id,
+                omdb.season_num, omdb.episode_num, expiration_date.strftime("%Y-%m-%d"), omdb.imdb_id))
 
     def query_mdb(self, key_id, expiration):
         mdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("mdb_data4", key_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM mdb_data4 WHERE key_id = ?", (key_id,))
                 row = cursor.fetchone()
@@ -499,27 +847,25 @@ class Cache:
 
     def update_mdb(self, expired, key_id, mdb, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO mdb_data4(key_id) VALUES(?)", (key_id,))
-                update_sql = "UPDATE mdb_data4 SET title = ?, year = ?, released = ?, type = ?, imdbid = ?, traktid = ?, " \
-                             "tmdbid = ?, score = ?, average = ?, imdb_rating = ?, metacritic_rating = ?, metacriticuser_rating = ?, " \
-                             "trakt_rating = ?, tomatoes_rating = ?, tomatoesaudience_rating = ?, tmdb_rating = ?, " \
-                             "letterboxd_rating = ?, myanimelist_rating = ?, certification = ?, commonsense = ?, expiration_date = ? WHERE key_id = ?"
-                cursor.execute(update_sql, (
-                    mdb.title, mdb.year, mdb.released.strftime("%Y-%m-%d") if mdb.released else None, mdb.type,
-                    mdb.imdbid, mdb.traktid, mdb.tmdbid, mdb.score, mdb.average, mdb.imdb_rating, mdb.metacritic_rating,
-                    mdb.metacriticuser_rating, mdb.trakt_rating, mdb.tomatoes_rating, mdb.tomatoesaudience_rating,
-                    mdb.tmdb_rating, mdb.letterboxd_rating, mdb.myanimelist_rating, mdb.content_rating, mdb.commonsense,
-                    expiration_date.strftime("%Y-%m-%d"), key_id
-                ))
+        with self._queue("mdb_data4", key_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO mdb_data4(key_id) VALUES(?)", (key_id,))
+            update_sql = "UPDATE mdb_data4 SET title = ?, year = ?, released = ?, type = ?, imdbid = ?, traktid = ?, " \
+                         "tmdbid = ?, score = ?, average = ?, imdb_rating = ?, metacritic_rating = ?, metacriticuser_rating = ?, " \
+                         "trakt_rating = ?, tomatoes_rating = ?, tomatoesaudience_rating = ?, tmdb_rating = ?, " \
+                         "letterboxd_rating = ?, myanimelist_rating = ?, certification = ?, commonsense = ?, expiration_date = ? WHERE key_id = ?"
+            cursor.execute(update_sql, (
+                mdb.title, mdb.year, mdb.released.strftime("%Y-%m-%d") if mdb.released else None, mdb.type,
+                mdb.imdbid, mdb.traktid, mdb.tmdbid, mdb.score, mdb.average, mdb.imdb_rating, mdb.metacritic_rating,
+                mdb.metacriticuser_rating, mdb.trakt_rating, mdb.tomatoes_rating, mdb.tomatoesaudience_rating,
+                mdb.tmdb_rating, mdb.letterboxd_rating, mdb.myanimelist_rating, mdb.content_rating, mdb.commonsense,
+                expiration_date.strftime("%Y-%m-%d"), key_id
+            ))
 
     def query_anidb(self, anidb_id, expiration):
         anidb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("anidb_data4", anidb_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM anidb_data4 WHERE anidb_id = ?", (anidb_id,))
                 row = cursor.fetchone()
@@ -543,24 +889,22 @@ class Cache:
 
     def update_anidb(self, expired, anidb_id, anidb, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO anidb_data4(anidb_id) VALUES(?)", (anidb_id,))
-                update_sql = "UPDATE anidb_data4 SET main_title = ?, titles = ?, studio = ?, rating = ?, average = ?, score = ?, " \
-                             "released = ?, tags = ?, mal_id = ?, imdb_id = ?, tmdb_id = ?, tmdb_type = ?, expiration_date = ? WHERE anidb_id = ?"
-                cursor.execute(update_sql, (
-                    anidb.main_title, json.dumps(anidb.titles), anidb.studio, anidb.rating, anidb.average, anidb.score,
-                    anidb.released.strftime("%Y-%m-%d") if anidb.released else None, json.dumps(anidb.tags),
-                    anidb.mal_id, anidb.imdb_id, anidb.tmdb_id, anidb.tmdb_type,
-                    expiration_date.strftime("%Y-%m-%d"), anidb_id
-                ))
+        with self._queue("anidb_data4", anidb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO anidb_data4(anidb_id) VALUES(?)", (anidb_id,))
+            update_sql = "UPDATE anidb_data4 SET main_title = ?, titles = ?, studio = ?, rating = ?, average = ?, score = ?, " \
+                         "released = ?, tags = ?, mal_id = ?, imdb_id = ?, tmdb_id = ?, tmdb_type = ?, expiration_date = ? WHERE anidb_id = ?"
+            cursor.execute(update_sql, (
+                anidb.main_title, json.dumps(anidb.titles), anidb.studio, anidb.rating, anidb.average, anidb.score,
+                anidb.released.strftime("%Y-%m-%d") if anidb.released else None, json.dumps(anidb.tags),
+                anidb.mal_id, anidb.imdb_id, anidb.tmdb_id, anidb.tmdb_type,
+                expiration_date.strftime("%Y-%m-%d"), anidb_id
+            ))
 
     def query_mal(self, mal_id, expiration):
         mal_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("mal_data2", mal_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM mal_data2 WHERE mal_id = ?", (mal_id,))
                 row = cursor.fetchone()
@@ -584,22 +928,20 @@ class Cache:
 
     def update_mal(self, expired, mal_id, mal, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO mal_data2(mal_id) VALUES(?)", (mal_id,))
-                update_sql = "UPDATE mal_data2 SET title = ?, title_english = ?, title_japanese = ?, status = ?, airing = ?, " \
-                             "aired = ?, rating = ?, score = ?, rank = ?, popularity = ?, genres = ?, studio = ?, expiration_date = ? WHERE mal_id = ?"
-                cursor.execute(update_sql, (
-                    mal.title, mal.title_english, mal.title_japanese, mal.status, mal.airing, mal.aired.strftime("%Y-%m-%d") if mal.aired else None,
-                    mal.rating, mal.score, mal.rank, mal.popularity, "|".join(mal.genres), mal.studio, expiration_date.strftime("%Y-%m-%d"), mal_id
-                ))
+        with self._queue("mal_data2", mal_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO mal_data2(mal_id) VALUES(?)", (mal_id,))
+            update_sql = "UPDATE mal_data2 SET title = ?, title_english = ?, title_japanese = ?, status = ?, airing = ?, " \
+                         "aired = ?, rating = ?, score = ?, rank = ?, popularity = ?, genres = ?, studio = ?, expiration_date = ? WHERE mal_id = ?"
+            cursor.execute(update_sql, (
+                mal.title, mal.title_english, mal.title_japanese, mal.status, mal.airing, mal.aired.strftime("%Y-%m-%d") if mal.aired else None,
+                mal.rating, mal.score, mal.rank, mal.popularity, "|".join(mal.genres), mal.studio, expiration_date.strftime("%Y-%m-%d"), mal_id
+            ))
 
     def query_tmdb_movie(self, tmdb_id, expiration):
         tmdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("tmdb_movie_data", tmdb_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM tmdb_movie_data WHERE tmdb_id = ?", (tmdb_id,))
                 row = cursor.fetchone()
@@ -628,26 +970,24 @@ class Cache:
 
     def update_tmdb_movie(self, expired, obj, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO tmdb_movie_data(tmdb_id) VALUES(?)", (obj.tmdb_id,))
-                update_sql = "UPDATE tmdb_movie_data SET title = ?, original_title = ?, studio = ?, overview = ?, tagline = ?, imdb_id = ?, " \
-                             "poster_url = ?, backdrop_url = ?, vote_count = ?, vote_average = ?, language_iso = ?, " \
-                             "language_name = ?, genres = ?, keywords = ?, release_date = ?, collection_id = ?, " \
-                             "collection_name = ?, expiration_date = ? WHERE tmdb_id = ?"
-                cursor.execute(update_sql, (
-                    obj.title, obj.original_title, obj.studio, obj.overview, obj.tagline, obj.imdb_id, obj.poster_url, obj.backdrop_url,
-                    obj.vote_count, obj.vote_average, obj.language_iso, obj.language_name, "|".join(obj.genres), "|".join(obj.keywords),
-                    obj.release_date.strftime("%Y-%m-%d") if obj.release_date else None, obj.collection_id, obj.collection_name,
-                    expiration_date.strftime("%Y-%m-%d"), obj.tmdb_id
-                ))
+        with self._queue("tmdb_movie_data", obj.tmdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO tmdb_movie_data(tmdb_id) VALUES(?)", (obj.tmdb_id,))
+            update_sql = "UPDATE tmdb_movie_data SET title = ?, original_title = ?, studio = ?, overview = ?, tagline = ?, imdb_id = ?, " \
+                         "poster_url = ?, backdrop_url = ?, vote_count = ?, vote_average = ?, language_iso = ?, " \
+                         "language_name = ?, genres = ?, keywords = ?, release_date = ?, collection_id = ?, " \
+                         "collection_name = ?, expiration_date = ? WHERE tmdb_id = ?"
+            cursor.execute(update_sql, (
+                obj.title, obj.original_title, obj.studio, obj.overview, obj.tagline, obj.imdb_id, obj.poster_url, obj.backdrop_url,
+                obj.vote_count, obj.vote_average, obj.language_iso, obj.language_name, "|".join(obj.genres), "|".join(obj.keywords),
+                obj.release_date.strftime("%Y-%m-%d") if obj.release_date else None, obj.collection_id, obj.collection_name,
+                expiration_date.strftime("%Y-%m-%d"), obj.tmdb_id
+            ))
 
     def query_tmdb_show(self, tmdb_id, expiration):
         tmdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("tmdb_show_data", tmdb_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM tmdb_show_data WHERE tmdb_id = ?", (tmdb_id,))
                 row = cursor.fetchone()
@@ -680,28 +1020,26 @@ class Cache:
 
     def update_tmdb_show(self, expired, obj, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO tmdb_show_data(tmdb_id) VALUES(?)", (obj.tmdb_id,))
-                update_sql = "UPDATE tmdb_show_data SET title = ?, original_title = ?, studio = ?, overview = ?, tagline = ?, imdb_id = ?, " \
-                             "poster_url = ?, backdrop_url = ?, vote_count = ?, vote_average = ?, language_iso = ?, " \
-                             "language_name = ?, genres = ?, keywords = ?, first_air_date = ?, last_air_date = ?, status = ?, " \
-                             "type = ?, tvdb_id = ?, countries = ?, seasons = ?, expiration_date = ? WHERE tmdb_id = ?"
-                cursor.execute(update_sql, (
-                    obj.title, obj.original_title, obj.studio, obj.overview, obj.tagline, obj.imdb_id, obj.poster_url, obj.backdrop_url,
-                    obj.vote_count, obj.vote_average, obj.language_iso, obj.language_name, "|".join(obj.genres), "|".join(obj.keywords),
-                    obj.first_air_date.strftime("%Y-%m-%d") if obj.first_air_date else None,
-                    obj.last_air_date.strftime("%Y-%m-%d") if obj.last_air_date else None,
-                    obj.status, obj.type, obj.tvdb_id, "|".join([str(c) for c in obj.countries]), "|".join([str(s) for s in obj.seasons]),
-                    expiration_date.strftime("%Y-%m-%d"), obj.tmdb_id
-                ))
+        with self._queue("tmdb_show_data", obj.tmdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO tmdb_show_data(tmdb_id) VALUES(?)", (obj.tmdb_id,))
+            update_sql = "UPDATE tmdb_show_data SET title = ?, original_title = ?, studio = ?, overview = ?, tagline = ?, imdb_id = ?, " \
+                         "poster_url = ?, backdrop_url = ?, vote_count = ?, vote_average = ?, language_iso = ?, " \
+                         "language_name = ?, genres = ?, keywords = ?, first_air_date = ?, last_air_date = ?, status = ?, " \
+                         "type = ?, tvdb_id = ?, countries = ?, seasons = ?, expiration_date = ? WHERE tmdb_id = ?"
+            cursor.execute(update_sql, (
+                obj.title, obj.original_title, obj.studio, obj.overview, obj.tagline, obj.imdb_id, obj.poster_url, obj.backdrop_url,
+                obj.vote_count, obj.vote_average, obj.language_iso, obj.language_name, "|".join(obj.genres), "|".join(obj.keywords),
+                obj.first_air_date.strftime("%Y-%m-%d") if obj.first_air_date else None,
+                obj.last_air_date.strftime("%Y-%m-%d") if obj.last_air_date else None,
+                obj.status, obj.type, obj.tvdb_id, "|".join([str(c) for c in obj.countries]), "|".join([str(s) for s in obj.seasons]),
+                expiration_date.strftime("%Y-%m-%d"), obj.tmdb_id
+            ))
 
     def query_tvdb(self, tvdb_id, is_movie, expiration):
         tvdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("tvdb_data3", tvdb_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM tvdb_data3 WHERE tvdb_id = ? and type = ?", (tvdb_id, "movie" if is_movie else "show"))
                 row = cursor.fetchone()
@@ -721,23 +1059,21 @@ class Cache:
 
     def update_tvdb(self, expired, obj, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO tvdb_data3(tvdb_id, type) VALUES(?, ?)", (obj.tvdb_id, "movie" if obj.is_movie else "show"))
-                update_sql = "UPDATE tvdb_data3 SET title = ?, summary = ?, poster_url = ?, background_url = ?, " \
-                             "release_date = ?, genres = ?, expiration_date = ? WHERE tvdb_id = ? AND type = ?"
-                tvdb_date = f"{str(obj.release_date.year).zfill(4)}-{str(obj.release_date.month).zfill(2)}-{str(obj.release_date.day).zfill(2)}" if obj.release_date else None
-                cursor.execute(update_sql, (
-                    obj.title, obj.summary, obj.poster_url, obj.background_url, tvdb_date, "|".join(obj.genres),
-                    expiration_date.strftime("%Y-%m-%d"), obj.tvdb_id, "movie" if obj.is_movie else "show"
-                ))
+        with self._queue("tvdb_data3", obj.tvdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO tvdb_data3(tvdb_id, type) VALUES(?, ?)", (obj.tvdb_id, "movie" if obj.is_movie else "show"))
+            update_sql = "UPDATE tvdb_data3 SET title = ?, summary = ?, poster_url = ?, background_url = ?, " \
+                         "release_date = ?, genres = ?, expiration_date = ? WHERE tvdb_id = ? AND type = ?"
+            tvdb_date = f"{str(obj.release_date.year).zfill(4)}-{str(obj.release_date.month).zfill(2)}-{str(obj.release_date.day).zfill(2)}" if obj.release_date else None
+            cursor.execute(update_sql, (
+                obj.title, obj.summary, obj.poster_url, obj.background_url, tvdb_date, "|".join(obj.genres),
+                expiration_date.strftime("%Y-%m-%d"), obj.tvdb_id, "movie" if obj.is_movie else "show"
+            ))
 
     def query_tvdb_map(self, tvdb_url, expiration):
         tvdb_id = None
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("tvdb_map", tvdb_url)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM tvdb_map WHERE tvdb_url = ?", (tvdb_url, ))
                 row = cursor.fetchone()
@@ -750,17 +1086,15 @@ class Cache:
 
     def update_tvdb_map(self, expired, tvdb_url, tvdb_id, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO tvdb_map(tvdb_url) VALUES(?)", (tvdb_url, ))
-                cursor.execute("UPDATE tvdb_map SET tvdb_id = ?, expiration_date = ? WHERE tvdb_url = ?", (tvdb_id, expiration_date.strftime("%Y-%m-%d"), tvdb_url))
+        with self._queue("tvdb_map", tvdb_url) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO tvdb_map(tvdb_url) VALUES(?)", (tvdb_url, ))
+            cursor.execute("UPDATE tvdb_map SET tvdb_id = ?, expiration_date = ? WHERE tvdb_url = ?", (tvdb_id, expiration_date.strftime("%Y-%m-%d"), tvdb_url))
 
     def query_anime_map(self, anime_id, id_type):
         ids = None
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("anime_map", anime_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"SELECT * FROM anime_map WHERE {id_type} = ?", (anime_id, ))
                 row = cursor.fetchone()
@@ -778,16 +1112,13 @@ class Cache:
 
     def update_anime_map(self, expired, anime_ids):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, self.expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO anime_map(anidb) VALUES(?)", (anime_ids["anidb"],))
-                cursor.execute("UPDATE anime_map SET anilist = ?, myanimelist = ?, kitsu = ?, expiration_date = ? WHERE anidb = ?", (anime_ids["anidb"], anime_ids["myanimelist"], anime_ids["kitsu"], expiration_date.strftime("%Y-%m-%d"), anime_ids["anidb"]))
+        with self._queue("anime_map", *anime_ids.values()) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO anime_map(anidb) VALUES(?)", (anime_ids["anidb"],))
+            cursor.execute("UPDATE anime_map SET anilist = ?, myanimelist = ?, kitsu = ?, expiration_date = ? WHERE anidb = ?", (anime_ids["anidb"], anime_ids["myanimelist"], anime_ids["kitsu"], expiration_date.strftime("%Y-%m-%d"), anime_ids["anidb"]))
 
     def get_image_table_name(self, library):
         table_name = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"SELECT * FROM image_maps WHERE library = ?", (library,))
                 row = cursor.fetchone()
@@ -834,8 +1165,8 @@ class Cache:
         return table_name
 
     def query_image_map(self, rating_key, table_name):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending(table_name, rating_key)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"SELECT * FROM {table_name} WHERE rating_key = ?", (rating_key,))
                 row = cursor.fetchone()
@@ -844,11 +1175,9 @@ class Cache:
         return None, None, None
 
     def update_image_map(self, rating_key, table_name, location, compare, overlay=""):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO {table_name}(rating_key) VALUES(?)", (rating_key,))
-                cursor.execute(f"UPDATE {table_name} SET location = ?, compare = ?, overlay = ? WHERE rating_key = ?", (location, compare, overlay, rating_key))
+        with self._queue(table_name, rating_key) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO {table_name}(rating_key) VALUES(?)", (rating_key,))
+            cursor.execute(f"UPDATE {table_name} SET location = ?, compare = ?, overlay = ? WHERE rating_key = ?", (location, compare, overlay, rating_key))
 
     def query_radarr_adds(self, tmdb_id, library):
         return self.query_arr_adds(tmdb_id, library, "radarr", "tmdb_id")
@@ -857,8 +1186,8 @@ class Cache:
         return self.query_arr_adds(tvdb_id, library, "sonarr", "tvdb_id")
 
     def query_arr_adds(self, t_id, library, arr, id_type):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending(f"{arr}_adds", t_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"SELECT * FROM {arr}_adds WHERE {id_type} = ? AND library = ?", (t_id, library))
                 row = cursor.fetchone()
@@ -873,16 +1202,13 @@ class Cache:
         return self.update_arr_adds(tvdb_id, library, "sonarr", "tvdb_id")
 
     def update_arr_adds(self, t_id, library, arr, id_type):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO {arr}_adds({id_type}, library) VALUES(?, ?)", (t_id, library))
+        with self._queue(f"{arr}_adds", t_id) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO {arr}_adds({id_type}, library) VALUES(?, ?)", (t_id, library))
 
     def update_list_cache(self, list_type, list_data, expired, expiration):
         list_key = None
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=expiration))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"INSERT OR IGNORE INTO list_cache(list_type, list_data) VALUES(?, ?)", (list_type, list_data))
                 cursor.execute(f"UPDATE list_cache SET expiration_date = ? WHERE list_type = ? AND list_data = ?", (expiration_date.strftime("%Y-%m-%d"), list_type, list_data))
@@ -892,11 +1218,32 @@ class Cache:
                     list_key = row["key"]
         return list_key
 
+    def query_library_snapshot(self, library):
+        self.flush()
+        snapshot = {}
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT rating_key, guid, title, type, updated_at FROM library_snapshot WHERE library = ?", (library,))
+                for row in cursor.fetchall():
+                    snapshot[row["rating_key"]] = (row["guid"], row["title"], row["type"], row["updated_at"])
+        return snapshot
+
+    def update_library_snapshot(self, library, items, full=False, removed=None):
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                if full:
+                    cursor.execute("DELETE FROM library_snapshot WHERE library = ?", (library,))
+                elif removed:
+                    cursor.executemany("DELETE FROM library_snapshot WHERE library = ? AND rating_key = ?", [(library, k) for k in removed])
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO library_snapshot(library, rating_key, guid, title, type, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(library, rating_key, guid, title, item_type, updated_at) for rating_key, (guid, title, item_type, updated_at) in items.items()]
+                )
+
     def query_list_cache(self, list_type, list_data, expiration):
         list_key = None
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"SELECT * FROM list_cache WHERE list_type = ? AND list_data = ?", (list_type, list_data))
                 row = cursor.fetchone()
@@ -911,15 +1258,13 @@ class Cache:
         final_ids = []
         for media_id, media_type in media_ids:
             final_ids.append((list_key, media_id, media_type))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.executemany(f"INSERT OR IGNORE INTO list_ids(list_key, media_id, media_type) VALUES(?, ?, ?)", final_ids)
 
     def query_list_ids(self, list_key):
         ids = []
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"SELECT * FROM list_ids WHERE list_key = ?", (list_key,))
                 for row in cursor:
@@ -927,16 +1272,15 @@ class Cache:
         return ids
 
     def delete_list_ids(self, list_key):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"DELETE FROM list_ids WHERE list_key = ?", (list_key,))
 
     def query_imdb_keywords(self, imdb_id, expiration):
         imdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("imdb_keywords", imdb_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM imdb_keywords WHERE imdb_id = ?", (imdb_id,))
                 row = cursor.fetchone()
@@ -950,18 +1294,16 @@ class Cache:
 
     def update_imdb_keywords(self, expired, imdb_id, keywords, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO imdb_keywords(imdb_id) VALUES(?)", (imdb_id,))
-                update_sql = "UPDATE imdb_keywords SET keywords = ?, expiration_date = ? WHERE imdb_id = ?"
-                cursor.execute(update_sql, ("|".join([f"{k}:{u}:{v}" for k, (u, v) in keywords.items()]), expiration_date.strftime("%Y-%m-%d"), imdb_id))
+        with self._queue("imdb_keywords", imdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO imdb_keywords(imdb_id) VALUES(?)", (imdb_id,))
+            update_sql = "UPDATE imdb_keywords SET keywords = ?, expiration_date = ? WHERE imdb_id = ?"
+            cursor.execute(update_sql, ("|".join([f"{k}:{u}:{v}" for k, (u, v) in keywords.items()]), expiration_date.strftime("%Y-%m-%d"), imdb_id))
 
     def query_imdb_parental(self, imdb_id, expiration):
         imdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("imdb_parental", imdb_id)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM imdb_parental WHERE imdb_id = ?", (imdb_id,))
                 row = cursor.fetchone()
@@ -978,20 +1320,17 @@ class Cache:
 
     def update_imdb_parental(self, expired, imdb_id, parental, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO imdb_parental(imdb_id) VALUES(?)", (imdb_id,))
-                update_sql = "UPDATE imdb_parental SET nudity = ?, violence = ?, profanity = ?, alcohol = ?, " \
-                             "frightening = ?, expiration_date = ? WHERE imdb_id = ?"
-                cursor.execute(update_sql, (parental["nudity"], parental["violence"], parental["profanity"], parental["alcohol"],
-                                            parental["frightening"], expiration_date.strftime("%Y-%m-%d"), imdb_id))
+        with self._queue("imdb_parental", imdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO imdb_parental(imdb_id) VALUES(?)", (imdb_id,))
+            update_sql = "UPDATE imdb_parental SET nudity = ?, violence = ?, profanity = ?, alcohol = ?, " \
+                         "frightening = ?, expiration_date = ? WHERE imdb_id = ?"
+            cursor.execute(update_sql, (parental["nudity"], parental["violence"], parental["profanity"], parental["alcohol"],
+                                        parental["frightening"], expiration_date.strftime("%Y-%m-%d"), imdb_id))
 
     def query_ergast(self, year, expiration):
         ergast_list = []
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM ergast_race WHERE season = ?", (year,))
                 for row in cursor.fetchall():
@@ -1010,8 +1349,7 @@ class Cache:
 
     def update_ergast(self, expired, season, races, expiration):
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("DELETE FROM ergast_race WHERE season = ?", (season,))
                 cursor.executemany("INSERT OR IGNORE INTO ergast_race(season, round) VALUES(?, ?)", [(r.season, r.round) for r in races])
@@ -1021,8 +1359,8 @@ class Cache:
 
     def query_overlay_special_text(self, rating_key):
         attrs = {}
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self._flush_pending("overlay_special_text", rating_key)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT * FROM overlay_special_text WHERE rating_key = ?", (rating_key, ))
                 for row in cursor.fetchall():
@@ -1031,18 +1369,15 @@ class Cache:
         return attrs
 
     def update_overlay_special_text(self, rating_key, data_type, text):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO overlay_special_text(rating_key, type) VALUES(?, ?)", (rating_key, data_type))
-                cursor.execute("UPDATE overlay_special_text SET text = ? WHERE rating_key = ? AND type = ?", (text, rating_key, data_type))
+        with self._queue("overlay_special_text", rating_key) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO overlay_special_text(rating_key, type) VALUES(?, ?)", (rating_key, data_type))
+            cursor.execute("UPDATE overlay_special_text SET text = ? WHERE rating_key = ? AND type = ?", (text, rating_key, data_type))
 
     def query_testing(self, name):
         value1 = None
         value2 = None
         success = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"SELECT * FROM testing WHERE name = ?", (name,))
                 row = cursor.fetchone()
@@ -1053,8 +1388,7 @@ class Cache:
         return value1, value2, success
 
     def update_testing(self, name, value1, value2, success):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"INSERT OR IGNORE INTO testing(name) VALUES(?)", (name,))
                 sql = f"UPDATE testing SET value1 = ?, value2 = ?, success = ? WHERE name = ?"
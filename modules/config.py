@@ -26,9 +26,9 @@ from modules.tautulli import Tautulli
 from modules.tmdb import TMDb
 from modules.trakt import Trakt
 from modules.tvdb import TVDb
-from modules.util import Failed, NotScheduled, NotScheduledRange, YAML
+from modules.util import Failed, NonExisting, NotScheduled, NotScheduledRange, YAML
 from modules.webhooks import Webhooks
-from retrying import retry
+from modules.retry import retry
 
 logger = util.logger
 
@@ -137,6 +137,7 @@ class ConfigFile:
         self.no_missing = attrs["no_missing"] if "no_missing" in attrs else None
         self.no_report = attrs["no_report"] if "no_report" in attrs else None
         self.ignore_schedules = attrs["ignore_schedules"] if "ignore_schedules" in attrs else False
+        self.cache_maintenance = attrs["cache_maintenance"] if "cache_maintenance" in attrs else False
         self.start_time = attrs["time_obj"]
         self.run_hour = datetime.strptime(attrs["time"], "%H:%M").hour
         self.requested_collections = None
@@ -418,6 +419,9 @@ class ConfigFile:
             "run_order": check_for_attribute(self.data, "run_order", parent="settings", var_type="lower_list", test_list=run_order_options, default=["operations", "metadata", "collections", "overlays"]),
             "cache": check_for_attribute(self.data, "cache", parent="settings", var_type="bool", default=True),
             "cache_expiration": check_for_attribute(self.data, "cache_expiration", parent="settings", var_type="int", default=60, int_min=1),
+            "memory_cache_size": check_for_attribute(self.data, "memory_cache_size", parent="settings", var_type="int", default=1000, int_min=0),
+            "cache_refresh_limit": check_for_attribute(self.data, "cache_refresh_limit", parent="settings", var_type="int", default=0, int_min=0),
+            "cache_maintenance": check_for_attribute(self.data, "cache_maintenance", parent="settings", default_is_none=True),
             "asset_directory": check_for_attribute(self.data, "asset_directory", parent="settings", var_type="list_path", default_is_none=True),
             "asset_folders": check_for_attribute(self.data, "asset_folders", parent="settings", var_type="bool", default=True),
             "asset_depth": check_for_attribute(self.data, "asset_depth", parent="settings", var_type="int", default=0),
@@ -433,6 +437,8 @@ class ConfigFile:
             "default_collection_order": check_for_attribute(self.data, "default_collection_order", parent="settings", default_is_none=True),
             "minimum_items": check_for_attribute(self.data, "minimum_items", parent="settings", var_type="int", default=1),
             "item_refresh_delay": check_for_attribute(self.data, "item_refresh_delay", parent="settings", var_type="int", default=0),
+            "incremental_sync": check_for_attribute(self.data, "incremental_sync", parent="settings", var_type="bool", default=False),
+            "collection_threads": check_for_attribute(self.data, "collection_threads", parent="settings", var_type="int", default=1, int_min=1),
             "delete_below_minimum": check_for_attribute(self.data, "delete_below_minimum", parent="settings", var_type="bool", default=False),
             "delete_not_scheduled": check_for_attribute(self.data, "delete_not_scheduled", parent="settings", var_type="bool", default=False),
             "run_again_delay": check_for_attribute(self.data, "run_again_delay", parent="settings", var_type="int", default=0),
@@ -501,9 +507,21 @@ class ConfigFile:
 
         if self.general["cache"]:
             logger.separator()
-            self.Cache = Cache(self.config_path, self.general["cache_expiration"])
+            self.Cache = Cache(self.config_path, self.general["cache_expiration"], refresh_limit=self.general["cache_refresh_limit"])
+            if self.general["cache_maintenance"] and not self.cache_maintenance:
+                if self.ignore_schedules:
+                    self.cache_maintenance = True
+                else:
+                    try:
+                        util.schedule_check("cache_maintenance", self.general["cache_maintenance"], current_time, self.run_hour)
+                        self.cache_maintenance = True
+                    except (NotScheduled, NonExisting):
+                        logger.info(f"Cache Maintenance Not Scheduled for {self.general['cache_maintenance']}")
+                    except Failed as e:
+                        logger.error(f"Config Error: cache_maintenance {e}")
         else:
             self.Cache = None
+            self.cache_maintenance = False
         self.GitHub = GitHub(self, {"token": check_for_attribute(self.data, "token", parent="github", default_is_none=True)})
 
         logger.separator()
@@ -720,6 +738,8 @@ class ConfigFile:
                 "token": check_for_attribute(self.data, "token", parent="plex", default_is_none=True),
                 "timeout": check_for_attribute(self.data, "timeout", parent="plex", var_type="int", default=60),
                 "db_cache": check_for_attribute(self.data, "db_cache", parent="plex", var_type="int", default_is_none=True),
+                "threads": check_for_attribute(self.data, "threads", parent="plex", var_type="int", default=1, int_min=1),
+                "reload_batch_size": check_for_attribute(self.data, "reload_batch_size", parent="plex", var_type="int", default=100, int_min=1),
                 "clean_bundles": check_for_attribute(self.data, "clean_bundles", parent="plex", var_type="bool", default=False),
                 "empty_trash": check_for_attribute(self.data, "empty_trash", parent="plex", var_type="bool", default=False),
                 "optimize": check_for_attribute(self.data, "optimize", parent="plex", var_type="bool", default=False)
@@ -803,6 +823,7 @@ class ConfigFile:
                 params["show_asset_not_needed"] = check_for_attribute(lib, "show_asset_not_needed", parent="settings", var_type="bool", default=self.general["show_asset_not_needed"], do_print=False, save=False)
                 params["minimum_items"] = check_for_attribute(lib, "minimum_items", parent="settings", var_type="int", default=self.general["minimum_items"], do_print=False, save=False)
                 params["item_refresh_delay"] = check_for_attribute(lib, "item_refresh_delay", parent="settings", var_type="int", default=self.general["item_refresh_delay"], do_print=False, save=False)
+                params["incremental_sync"] = check_for_attribute(lib, "incremental_sync", parent="settings", var_type="bool", default=self.general["incremental_sync"], do_print=False, save=False)
                 params["delete_below_minimum"] = check_for_attribute(lib, "delete_below_minimum", parent="settings", var_type="bool", default=self.general["delete_below_minimum"], do_print=False, save=False)
                 params["delete_not_scheduled"] = check_for_attribute(lib, "delete_not_scheduled", parent="settings", var_type="bool", default=self.general["delete_not_scheduled"], do_print=False, save=False)
                 params["ignore_ids"] = check_for_attribute(lib, "ignore_ids", parent="settings", var_type="int_list", default_is_none=True, do_print=False, save=False)
@@ -1072,6 +1093,8 @@ class ConfigFile:
                         "token": check_for_attribute(lib, "token", parent="plex", default=self.general["plex"]["token"], req_default=True, save=False),
                         "timeout": check_for_attribute(lib, "timeout", parent="plex", var_type="int", default=self.general["plex"]["timeout"], save=False),
                         "db_cache": check_for_attribute(lib, "db_cache", parent="plex", var_type="int", default=self.general["plex"]["db_cache"], default_is_none=True, save=False),
+                        "threads": check_for_attribute(lib, "threads", parent="plex", var_type="int", default=self.general["plex"]["threads"], int_min=1, save=False),
+                        "reload_batch_size": check_for_attribute(lib, "reload_batch_size", parent="plex", var_type="int", default=self.general["plex"]["reload_batch_size"], int_min=1, save=False),
                         "clean_bundles": check_for_attribute(lib, "clean_bundles", parent="plex", var_type="bool", default=self.general["plex"]["clean_bundles"], save=False),
                         "empty_trash": check_for_attribute(lib, "empty_trash", parent="plex", var_type="bool", default=self.general["plex"]["empty_trash"], save=False),
                         "optimize": check_for_attribute(lib, "optimize", parent="plex", var_type="bool", default=self.general["plex"]["optimize"], save=False)
@@ -1225,7 +1248,7 @@ class ConfigFile:
             logger.error(str(response.content))
             raise
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000)
+    @retry()
     def get(self, url, json=None, headers=None, params=None):
         return self.session.get(url, json=json, headers=headers, params=params)
 
@@ -1243,7 +1266,7 @@ class ConfigFile:
             logger.error(str(response.content))
             raise
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000)
+    @retry()
     def post(self, url, data=None, json=None, headers=None):
         return self.session.post(url, data=data, json=json, headers=headers)
 
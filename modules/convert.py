@@ -1,4 +1,5 @@
-import re, requests
+import json, os, re, requests, threading
+from concurrent.futures import ThreadPoolExecutor
 from modules import util
 from modules.util import Failed, NonExisting
 from plexapi.exceptions import BadRequest
@@ -6,37 +7,154 @@ from plexapi.exceptions import BadRequest
 logger = util.logger
 
 anime_lists_url = "https://raw.githubusercontent.com/meisnate12/Plex-Meta-Manager-Anime-IDs/master/pmm_anime_ids.json"
+anime_index_version = 1
+anime_int_maps = ["anidb_ids", "mal_to_anidb", "anidb_to_mal", "anilist_to_anidb", "anidb_to_tvdb", "tvdb_to_anidb"]
+tmdb_rate_limit = 40
+crosswalk_maps = ["imdb_to_tmdb", "tmdb_to_imdb", "imdb_to_tvdb", "tvdb_to_imdb", "tmdb_to_tvdb", "tvdb_to_tmdb"]
 
 class Convert:
     def __init__(self, config):
         self.config = config
-        self._anidb_ids = {}
-        self._mal_to_anidb = {}
-        self._anidb_to_mal = {}
-        self._anilist_to_anidb = {}
-        self._anidb_to_imdb = {}
-        self._anidb_to_tvdb = {}
-        self._imdb_to_anidb = {}
-        self._tvdb_to_anidb = {}
-        self._anidb_ids = self.config.get_json(anime_lists_url)
-        for anidb_id, ids in self._anidb_ids.items():
+        self.anime_ids_path = os.path.join(self.config.default_dir, "anime_ids.index")
+        self._anime_maps = None
+        self._anime_lock = threading.Lock()
+        self.tmdb_limiter = util.RateLimiter(tmdb_rate_limit)
+        self._crosswalk = None
+        self._crosswalk_misses = {m: set() for m in crosswalk_maps}
+        self._crosswalk_lock = threading.Lock()
+
+    def _read_anime_index(self):
+        with open(self.anime_ids_path, "rb") as f:
+            header = json.loads(f.readline().decode("utf-8"))
+            if header.get("version") != anime_index_version:
+                raise ValueError(f"Index version {header.get('version')} is not {anime_index_version}")
+            anime_maps = {name: util.IntMap.fromfile(f, header["sizes"][name]) for name in anime_int_maps}
+        anime_maps["anidb_to_imdb"] = {int(k): v for k, v in header["anidb_to_imdb"].items()}
+        anime_maps["imdb_to_anidb"] = header["imdb_to_anidb"]
+        return header, anime_maps
+
+    def _write_anime_index(self, anime_maps, etag, last_modified):
+        header = {
+            "version": anime_index_version, "etag": etag, "last_modified": last_modified,
+            "sizes": {name: len(anime_maps[name]) for name in anime_int_maps},
+            "anidb_to_imdb": anime_maps["anidb_to_imdb"], "imdb_to_anidb": anime_maps["imdb_to_anidb"]
+        }
+        with open(f"{self.anime_ids_path}.tmp", "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for name in anime_int_maps:
+                anime_maps[name].tofile(f)
+        os.replace(f"{self.anime_ids_path}.tmp", self.anime_ids_path)
+
+    def _build_anime_maps(self, anime_ids):
+        mal_to_anidb = {}
+        anidb_to_mal = {}
+        anilist_to_anidb = {}
+        anidb_to_imdb = {}
+        anidb_to_tvdb = {}
+        imdb_to_anidb = {}
+        tvdb_to_anidb = {}
+        anidb_ids = []
+        for anidb_id, ids in anime_ids.items():
             anidb_id = int(anidb_id)
+            anidb_ids.append((anidb_id, anidb_id))
             if "mal_id" in ids:
                 for mal_id in util.get_list(ids["mal_id"], int_list=True):
-                    self._mal_to_anidb[mal_id] = anidb_id
-                    if anidb_id not in self._anidb_to_mal:
-                        self._anidb_to_mal[anidb_id] = mal_id
+                    mal_to_anidb[mal_id] = anidb_id
+                    if anidb_id not in anidb_to_mal:
+                        anidb_to_mal[anidb_id] = mal_id
             if "anilist_id" in ids:
                 for anilist_id in util.get_list(ids["anilist_id"], int_list=True):
-                    self._anilist_to_anidb[anilist_id] = anidb_id
+                    anilist_to_anidb[anilist_id] = anidb_id
             if "imdb_id" in ids and str(ids["imdb_id"]).startswith("tt"):
-                self._anidb_to_imdb[anidb_id] = util.get_list(ids["imdb_id"])
+                anidb_to_imdb[anidb_id] = util.get_list(ids["imdb_id"])
                 for im_id in util.get_list(ids["imdb_id"]):
-                    self._imdb_to_anidb[im_id] = anidb_id
+                    imdb_to_anidb[im_id] = anidb_id
             if "tvdb_id" in ids:
-                self._anidb_to_tvdb[anidb_id] = int(ids["tvdb_id"])
+                anidb_to_tvdb[anidb_id] = int(ids["tvdb_id"])
                 if "tvdb_season" in ids and ids["tvdb_season"] in [1, -1] and ids["tvdb_epoffset"] == 0:
-                    self._tvdb_to_anidb[int(ids["tvdb_id"])] = anidb_id
+                    tvdb_to_anidb[int(ids["tvdb_id"])] = anidb_id
+        return {
+            "anidb_ids": util.IntMap(anidb_ids),
+            "mal_to_anidb": util.IntMap(mal_to_anidb.items()),
+            "anidb_to_mal": util.IntMap(anidb_to_mal.items()),
+            "anilist_to_anidb": util.IntMap(anilist_to_anidb.items()),
+            "anidb_to_tvdb": util.IntMap(anidb_to_tvdb.items()),
+            "tvdb_to_anidb": util.IntMap(tvdb_to_anidb.items()),
+            "anidb_to_imdb": anidb_to_imdb,
+            "imdb_to_anidb": imdb_to_anidb
+        }
+
+    def _load_anime_maps(self):
+        saved = None
+        headers = {}
+        if os.path.exists(self.anime_ids_path):
+            try:
+                header, saved = self._read_anime_index()
+                if header.get("etag"):
+                    headers["If-None-Match"] = header["etag"]
+                if header.get("last_modified"):
+                    headers["If-Modified-Since"] = header["last_modified"]
+            except (OSError, ValueError, KeyError, EOFError, AttributeError) as e:
+                logger.debug(f"Convert Error: Failed to read saved Anime IDs: {e}")
+                saved = None
+        try:
+            response = self.config.get(anime_lists_url, headers=headers)
+            if response.status_code == 304 and saved:
+                logger.debug("Anime IDs unchanged, using saved copy")
+                return saved
+            response.raise_for_status()
+            anime_ids = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if saved:
+                logger.warning(f"Convert Warning: Failed to download Anime IDs, using saved copy: {e}")
+                return saved
+            logger.error(f"Convert Error: Failed to download Anime IDs: {e}")
+            return self._build_anime_maps({})
+        anime_maps = self._build_anime_maps(anime_ids)
+        try:
+            self._write_anime_index(anime_maps, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        except OSError as e:
+            logger.debug(f"Convert Error: Failed to save Anime IDs: {e}")
+        return anime_maps
+
+    def _anime_map(self, name):
+        if self._anime_maps is None:
+            with self._anime_lock:
+                if self._anime_maps is None:
+                    self._anime_maps = self._load_anime_maps()
+        return self._anime_maps[name]
+
+    @property
+    def _anidb_ids(self):
+        return self._anime_map("anidb_ids")
+
+    @property
+    def _mal_to_anidb(self):
+        return self._anime_map("mal_to_anidb")
+
+    @property
+    def _anidb_to_mal(self):
+        return self._anime_map("anidb_to_mal")
+
+    @property
+    def _anilist_to_anidb(self):
+        return self._anime_map("anilist_to_anidb")
+
+    @property
+    def _anidb_to_imdb(self):
+        return self._anime_map("anidb_to_imdb")
+
+    @property
+    def _anidb_to_tvdb(self):
+        return self._anime_map("anidb_to_tvdb")
+
+    @property
+    def _imdb_to_anidb(self):
+        return self._anime_map("imdb_to_anidb")
+
+    @property
+    def _tvdb_to_anidb(self):
+        return self._anime_map("tvdb_to_anidb")
 
     def imdb_to_anidb(self, imdb_id):
         if imdb_id in self._imdb_to_anidb:
@@ -67,7 +185,7 @@ class Convert:
                     ids.append((self._anidb_to_tvdb[anidb_id], "tvdb"))
             elif anidb_id in self._anidb_to_tvdb:
                 ids.append((self._anidb_to_tvdb[anidb_id], "tvdb"))
-            elif str(anidb_id) in self._anidb_ids:
+            elif anidb_id in self._anidb_ids:
                 logger.warning(f"Convert Warning: No TVDb ID or IMDb ID found for AniDB ID: {anidb_id}")
             else:
                 logger.error(f"AniDB Error: No Anime found for AniDB ID: {anidb_id}")
@@ -93,18 +211,78 @@ class Convert:
                 logger.warning(f"Convert Warning: No AniDB ID Found for MyAnimeList ID: {mal_id}")
         return ids
 
+    @property
+    def crosswalk(self):
+        if self._crosswalk is None:
+            with self._crosswalk_lock:
+                if self._crosswalk is None:
+                    self._crosswalk = self.config.Cache.load_crosswalk() if self.config.Cache else {m: {} for m in crosswalk_maps}
+                    logger.debug(f"Crosswalk Loaded: {', '.join([f'{m}: {len(v)}' for m, v in self._crosswalk.items()])}")
+        return self._crosswalk
+
+    def _crosswalk_key(self, id_type, _id):
+        if id_type != "imdb":
+            try:
+                return int(_id)
+            except (TypeError, ValueError):
+                pass
+        return _id
+
+    def _crosswalk_get(self, from_type, to_type, _id):
+        return self.crosswalk[f"{from_type}_to_{to_type}"].get(self._crosswalk_key(from_type, _id))
+
+    def _crosswalk_add(self, from_type, from_id, to_type, to_id, reverse=True):
+        self.crosswalk[f"{from_type}_to_{to_type}"][self._crosswalk_key(from_type, from_id)] = to_id
+        if reverse:
+            self.crosswalk[f"{to_type}_to_{from_type}"][self._crosswalk_key(to_type, to_id)] = from_id
+
+    def convert_many(self, ids, from_type, to_type, threads=1):
+        converters = {
+            "imdb_to_tmdb": self.imdb_to_tmdb, "tmdb_to_imdb": self.tmdb_to_imdb,
+            "imdb_to_tvdb": self.imdb_to_tvdb, "tvdb_to_imdb": self.tvdb_to_imdb,
+            "tmdb_to_tvdb": self.tmdb_to_tvdb, "tvdb_to_tmdb": self.tvdb_to_tmdb
+        }
+        map_name = f"{from_type}_to_{to_type}"
+        converter = converters[map_name]
+        converted = {}
+        missing = []
+        known_misses = 0
+        for _id in dict.fromkeys(ids):
+            local_id = self._crosswalk_get(from_type, to_type, _id)
+            if local_id:
+                converted[_id] = local_id
+            elif self._crosswalk_key(from_type, _id) in self._crosswalk_misses[map_name]:
+                known_misses += 1
+            else:
+                missing.append(_id)
+        logger.debug(f"Crosswalk: {len(converted)} of {len(converted) + len(missing) + known_misses} {from_type.upper()} IDs converted locally")
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(threads, 1)) as executor:
+                for _id, new_id in zip(missing, executor.map(converter, missing)):
+                    if new_id and new_id != (None, None):
+                        converted[_id] = new_id
+                    else:
+                        self._crosswalk_misses[map_name].add(self._crosswalk_key(from_type, _id))
+        return converted
+
     def tmdb_to_imdb(self, tmdb_id, is_movie=True, fail=False):
         media_type = "movie" if is_movie else "show"
         expired = False
+        if is_movie and self._crosswalk_get("tmdb", "imdb", tmdb_id):
+            return self._crosswalk_get("tmdb", "imdb", tmdb_id)
         if self.config.Cache and is_movie:
             cache_id, expired = self.config.Cache.query_imdb_to_tmdb_map(tmdb_id, imdb=False, media_type=media_type)
             if cache_id and not expired:
                 return cache_id
         try:
+            self.tmdb_limiter.wait()
             imdb_id = self.config.TMDb.convert_from(tmdb_id, "imdb_id", is_movie)
             if imdb_id:
                 if self.config.Cache:
                     self.config.Cache.update_imdb_to_tmdb_map(media_type, expired, imdb_id, tmdb_id)
+                if is_movie:
+                    self._crosswalk_add("tmdb", tmdb_id, "imdb", imdb_id, reverse=False)
+                    self._crosswalk_add("imdb", imdb_id, "tmdb", (self._crosswalk_key("tmdb", tmdb_id), media_type), reverse=False)
                 return imdb_id
         except Failed:
             pass
@@ -115,15 +293,21 @@ class Convert:
 
     def imdb_to_tmdb(self, imdb_id, fail=False):
         expired = False
+        if self._crosswalk_get("imdb", "tmdb", imdb_id):
+            return self._crosswalk_get("imdb", "tmdb", imdb_id)
         if self.config.Cache:
             cache_id, cache_type, expired = self.config.Cache.query_imdb_to_tmdb_map(imdb_id, imdb=True, return_type=True)
             if cache_id and not expired:
                 return cache_id, cache_type
         try:
+            self.tmdb_limiter.wait()
             tmdb_id, tmdb_type = self.config.TMDb.convert_imdb_to(imdb_id)
             if tmdb_id:
                 if self.config.Cache:
                     self.config.Cache.update_imdb_to_tmdb_map(tmdb_type, expired, imdb_id, tmdb_id)
+                self._crosswalk_add("imdb", imdb_id, "tmdb", (tmdb_id, tmdb_type), reverse=False)
+                if tmdb_type == "movie":
+                    self._crosswalk_add("tmdb", tmdb_id, "imdb", imdb_id, reverse=False)
                 return tmdb_id, tmdb_type
         except Failed:
             pass
@@ -134,15 +318,19 @@ class Convert:
 
     def tmdb_to_tvdb(self, tmdb_id, fail=False):
         expired = False
+        if self._crosswalk_get("tmdb", "tvdb", tmdb_id):
+            return self._crosswalk_get("tmdb", "tvdb", tmdb_id)
         if self.config.Cache:
             cache_id, expired = self.config.Cache.query_tmdb_to_tvdb_map(tmdb_id, tmdb=True)
             if cache_id and not expired:
                 return cache_id
         try:
+            self.tmdb_limiter.wait()
             tvdb_id = self.config.TMDb.convert_from(tmdb_id, "tvdb_id", False)
             if tvdb_id:
                 if self.config.Cache:
                     self.config.Cache.update_tmdb_to_tvdb_map(expired, tmdb_id, tvdb_id)
+                self._crosswalk_add("tmdb", tmdb_id, "tvdb", tvdb_id)
                 return tvdb_id
         except Failed:
             pass
@@ -153,15 +341,19 @@ class Convert:
 
     def tvdb_to_tmdb(self, tvdb_id, fail=False):
         expired = False
+        if self._crosswalk_get("tvdb", "tmdb", tvdb_id):
+            return self._crosswalk_get("tvdb", "tmdb", tvdb_id)
         if self.config.Cache:
             cache_id, expired = self.config.Cache.query_tmdb_to_tvdb_map(tvdb_id, tmdb=False)
             if cache_id and not expired:
                 return cache_id
         try:
+            self.tmdb_limiter.wait()
             tmdb_id = self.config.TMDb.convert_tvdb_to(tvdb_id)
             if tmdb_id:
                 if self.config.Cache:
                     self.config.Cache.update_tmdb_to_tvdb_map(expired, tmdb_id, tvdb_id)
+                self._crosswalk_add("tvdb", tvdb_id, "tmdb", tmdb_id)
                 return tmdb_id
         except Failed:
             pass
@@ -172,6 +364,8 @@ class Convert:
 
     def tvdb_to_imdb(self, tvdb_id, fail=False):
         expired = False
+        if self._crosswalk_get("tvdb", "imdb", tvdb_id):
+            return self._crosswalk_get("tvdb", "imdb", tvdb_id)
         if self.config.Cache:
             cache_id, expired = self.config.Cache.query_imdb_to_tvdb_map(tvdb_id, imdb=False)
             if cache_id and not expired:
@@ -181,6 +375,7 @@ class Convert:
             if imdb_id:
                 if self.config.Cache:
                     self.config.Cache.update_imdb_to_tvdb_map(expired, imdb_id, tvdb_id)
+                self._crosswalk_add("tvdb", tvdb_id, "imdb", imdb_id)
                 return imdb_id
         except Failed:
             pass
@@ -191,6 +386,8 @@ class Convert:
 
     def imdb_to_tvdb(self, imdb_id, fail=False):
         expired = False
+        if self._crosswalk_get("imdb", "tvdb", imdb_id):
+            return self._crosswalk_get("imdb", "tvdb", imdb_id)
         if self.config.Cache:
             cache_id, expired = self.config.Cache.query_imdb_to_tvdb_map(imdb_id, imdb=True)
             if cache_id and not expired:
@@ -202,6 +399,7 @@ class Convert:
                 if tvdb_id:
                     if self.config.Cache:
                         self.config.Cache.update_imdb_to_tvdb_map(expired, imdb_id, tvdb_id)
+                    self._crosswalk_add("imdb", imdb_id, "tvdb", tvdb_id)
                     return tvdb_id
         except Failed:
             pass
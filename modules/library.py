@@ -1,4 +1,6 @@
 import os, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from abc import ABC, abstractmethod
 from modules import util, operations
 from modules.meta import MetadataFile, OverlayFile
@@ -8,6 +10,29 @@ from PIL import Image
 
 logger = util.logger
 
+class ItemRecord:
+    __slots__ = ("ratingKey", "guid", "title", "year", "type", "librarySectionID", "parentRatingKey", "grandparentRatingKey", "updatedAt", "labels")
+
+    def __init__(self, item=None, **kwargs):
+        for attr in self.__slots__:
+            if item is None:
+                value = kwargs[attr] if attr in kwargs else None
+            else:
+                try:
+                    value = object.__getattribute__(item, attr)
+                except AttributeError:
+                    value = None
+                if attr == "labels":
+                    value = tuple(label.tag for label in value) if value else ()
+            setattr(self, attr, value)
+
+    @property
+    def snapshot(self):
+        return self.guid, self.title, self.type, int(self.updatedAt.timestamp()) if self.updatedAt else 0
+
+    def __repr__(self):
+        return f"<ItemRecord:{self.ratingKey}:{self.title}>"
+
 class Library(ABC):
     def __init__(self, config, params):
         self.Radarr = None
@@ -82,6 +107,7 @@ class Library(ABC):
         self.only_filter_missing = params["only_filter_missing"]
         self.ignore_ids = params["ignore_ids"]
         self.ignore_imdb_ids = params["ignore_imdb_ids"]
+        self.incremental_sync = params["incremental_sync"]
         self.assets_for_all = params["assets_for_all"]
         self.assets_for_all_collections = False
         self.delete_collections = params["delete_collections"]
@@ -203,7 +229,7 @@ class Library(ABC):
                     _, image_compare, _ = self.config.Cache.query_image_map(item.ratingKey, self.image_table_name)
                 if not image_compare or str(poster.compare) != str(image_compare):
                     if overlay:
-                        self.reload(item, force=True)
+                        item = self.reload(item, force=True)
                         if overlay and "Overlay" in [la.tag for la in self.item_labels(item)]:
                             item.removeLabel("Overlay")
                     self._upload_image(item, poster)
@@ -275,6 +301,18 @@ class Library(ABC):
     def reload(self, item, force=False):
         pass
 
+    @abstractmethod
+    def prefetch(self, items):
+        pass
+
+    @abstractmethod
+    def get_changed(self, since):
+        pass
+
+    @abstractmethod
+    def get_rating_key_set(self):
+        pass
+
     @abstractmethod
     def edit_tags(self, attr, obj, add_tags=None, remove_tags=None, sync_tags=None, do_print=True, locked=True, is_locked=None):
         pass
@@ -355,35 +393,96 @@ class Library(ABC):
         logger.info("")
         logger.separator(f"Caching {self.name} Library Items", space=False, border=False)
         logger.info("")
+        if self.incremental_sync and self.config.Cache:
+            snapshot = self.config.Cache.query_library_snapshot(self.mapping_name)
+            if snapshot:
+                changed = self.get_changed(max([s[3] for s in snapshot.values()]) - 1)
+                changes = {}
+                for item in changed:
+                    self.cached_items[item.ratingKey] = ItemRecord(item)
+                    changes[item.ratingKey] = self.cached_items[item.ratingKey].snapshot
+                listed = self.get_rating_key_set()
+                removed = set(snapshot) - listed
+                if not listed - set(snapshot) - set(changes):
+                    self.config.Cache.update_library_snapshot(self.mapping_name, changes, removed=removed)
+                    if removed:
+                        logger.info(f"{len(removed)} {self.type}s were Removed since the Last Sync")
+                    items = changed
+                    for rating_key, (guid, title, item_type, updated_at) in snapshot.items():
+                        if rating_key not in changes and rating_key not in removed:
+                            self.cached_items[rating_key] = ItemRecord(
+                                ratingKey=rating_key, guid=guid, title=title, type=item_type, librarySectionID=self.Plex.key,
+                                updatedAt=datetime.fromtimestamp(updated_at) if updated_at else None
+                            )
+                            items.append((rating_key, guid))
+                    logger.info(f"Using {len(items) - len(changed)} Unchanged {self.type}s from the Last Sync")
+                    return items
+                logger.info(f"{self.type}s were Added since the Last Sync that were not Loaded")
         items = self.get_all()
         for item in items:
-            self.cached_items[item.ratingKey] = (item, False)
+            self.cached_items[item.ratingKey] = ItemRecord(item)
+        if self.incremental_sync and self.config.Cache:
+            self.config.Cache.update_library_snapshot(self.mapping_name, {i.ratingKey: self.cached_items[i.ratingKey].snapshot for i in items}, full=True)
         return items
 
     def map_guids(self, items):
-        for i, item in enumerate(items, 1):
-            if isinstance(item, tuple):
-                logger.ghost(f"Processing: {i}/{len(items)}")
-                key, guid = item
-            else:
-                logger.ghost(f"Processing: {i}/{len(items)} {item.title}")
-                key = item.ratingKey
-                guid = item.guid
+        if self.config.Cache:
+            logger.info(f"Loading Cached GUIDs for {len(items)} {self.type}s")
+            loaded = self.config.Cache.preload_guid_map([i[1] if isinstance(i, tuple) else i.guid for i in items])
+            logger.info(f"Loaded {loaded} Cached GUIDs")
+        results = [None] * len(items)
+        misses = []
+        for i, item in enumerate(items):
+            key, guid = item if isinstance(item, tuple) else (item.ratingKey, item.guid)
             if key not in self.movie_rating_key_map and key not in self.show_rating_key_map:
-                if isinstance(item, tuple):
-                    item_type, check_id = self.config.Convert.scan_guid(guid)
-                    id_type, main_id, imdb_id, _ = self.config.Convert.ids_from_cache(key, guid, item_type, check_id, self)
+                item_type, check_id = self.config.Convert.scan_guid(guid)
+                id_type, main_id, imdb_id, expired = self.config.Convert.ids_from_cache(key, guid, item_type, check_id, self)
+                if (main_id or imdb_id) and expired is False:
+                    results[i] = (id_type, main_id, imdb_id)
                 else:
-                    id_type, main_id, imdb_id = self.config.Convert.get_id(item, self)
-                if main_id:
-                    if id_type == "movie":
-                        self.movie_rating_key_map[key] = main_id[0]
-                        util.add_dict_list(main_id, key, self.movie_map)
-                    elif id_type == "show":
-                        self.show_rating_key_map[key] = main_id[0]
-                        util.add_dict_list(main_id, key, self.show_map)
-                if imdb_id:
-                    self.imdb_rating_key_map[key] = imdb_id[0]
-                    util.add_dict_list(imdb_id, key, self.imdb_map)
+                    misses.append(i)
+        logger.info(f"Resolved {len(items) - len(misses)} {self.type}s from the Cache")
+
+        def resolve(index):
+            item = items[index]
+            if isinstance(item, tuple):
+                try:
+                    return self.config.Convert.get_id(self.fetch_item(item[0]), self)
+                except Failed as e:
+                    logger.error(e)
+                    return None
+            return self.config.Convert.get_id(item, self)
+
+        def resolve_buffered(index):
+            logger.start_buffer()
+            try:
+                result = resolve(index)
+            except Exception as e:
+                return logger.end_buffer(), None, e
+            return logger.end_buffer(), result, None
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for done, (index, (records, result, error)) in enumerate(zip(misses, executor.map(resolve_buffered, misses)), 1):
+                logger.replay(records)
+                if error:
+                    raise error
+                logger.ghost(f"Processing: {done}/{len(misses)}")
+                results[index] = result
+
+        for i, item in enumerate(items):
+            if results[i] is None:
+                continue
+            key = item[0] if isinstance(item, tuple) else item.ratingKey
+            id_type, main_id, imdb_id = results[i]
+            if main_id:
+                if id_type == "movie":
+                    self.movie_rating_key_map[key] = main_id[0]
+                    util.add_dict_list(main_id, key, self.movie_map)
+                elif id_type == "show":
+                    self.show_rating_key_map[key] = main_id[0]
+                    util.add_dict_list(main_id, key, self.show_map)
+            if imdb_id:
+                self.imdb_rating_key_map[key] = imdb_id[0]
+                util.add_dict_list(imdb_id, key, self.imdb_map)
         logger.info("")
         logger.info(f"Processed {len(items)} {self.type}s")
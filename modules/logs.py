@@ -1,4 +1,4 @@
-import io, logging, os, re, sys, traceback
+import io, logging, os, re, sys, threading, traceback
 from logging.handlers import RotatingFileHandler
 
 LOG_DIR = "logs"
@@ -51,6 +51,8 @@ class MyLogger:
         self.secrets = []
         self.spacing = 0
         self.playlists_log = os.path.join(self.playlists_dir, PLAYLISTS_LOG)
+        self._local = threading.local()
+        self._emit_lock = threading.RLock()
         os.makedirs(self.log_dir, exist_ok=True)
         self._logger = logging.getLogger(None if self.log_requests else self.logger_name)
         self._logger.setLevel(logging.DEBUG)
@@ -63,6 +65,22 @@ class MyLogger:
     def clear_errors(self):
         self.saved_errors = []
 
+    def start_buffer(self):
+        self._local.buffer = []
+
+    def current_buffer(self):
+        return getattr(self._local, "buffer", None)
+
+    def end_buffer(self):
+        records = self.current_buffer() or []
+        self._local.buffer = None
+        return records
+
+    def replay(self, records):
+        with self._emit_lock:
+            for level, msg, args, kwargs, caller in records:
+                self._log(level, msg, args, caller=caller, **kwargs)
+
     def _get_handler(self, log_file, count=3):
         _handler = RotatingFileHandler(log_file, delay=True, mode="w", backupCount=count, encoding="utf-8")
         self._formatter(handler=_handler)
@@ -212,7 +230,7 @@ class MyLogger:
         return display_title
 
     def ghost(self, text):
-        if not self.ignore_ghost:
+        if not self.ignore_ghost and self.current_buffer() is None:
             try:
                 print(self._space(f"| {text}"), end="\r")
             except UnicodeEncodeError:
@@ -221,7 +239,7 @@ class MyLogger:
             self.spacing = len(text) + 2
 
     def exorcise(self):
-        if not self.ignore_ghost:
+        if not self.ignore_ghost and self.current_buffer() is None:
             print(self._space(" "), end="\r")
             self.spacing = 0
 
@@ -229,44 +247,55 @@ class MyLogger:
         if text and str(text) not in self.secrets:
             self.secrets.append(str(text))
 
-    def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1):
-        trace = level == TRACE
-        log_only = False
-        if trace:
-            level = DEBUG
-        if trace or msg.startswith("|"):
-            self._formatter(trace=trace, border=not msg.startswith("|"))
-        if self.spacing > 0:
-            self.exorcise()
-        if "\n" in msg:
-            for i, line in enumerate(msg.split("\n")):
-                self._log(level, line, args, exc_info=exc_info, extra=extra, stack_info=stack_info, stacklevel=stacklevel)
-                if i == 0:
-                    self._formatter(log_only=True, space=True)
-            log_only = True
-        else:
-            for secret in self.secrets:
-                if secret in msg:
-                    msg = msg.replace(secret, "(redacted)")
-            if "HTTPConnectionPool" in msg:
-                msg = re.sub("HTTPConnectionPool\\((.*?)\\)", "HTTPConnectionPool(redacted)", msg)
-            if "HTTPSConnectionPool" in msg:
-                msg = re.sub("HTTPSConnectionPool\\((.*?)\\)", "HTTPSConnectionPool(redacted)", msg)
-            try:
-                if not _srcfile:
-                    raise ValueError
-                fn, lno, func, sinfo = self.findCaller(stack_info, stacklevel)
-            except ValueError:
-                fn, lno, func, sinfo = "(unknown file)", 0, "(unknown function)", None
-            if exc_info:
-                if isinstance(exc_info, BaseException):
-                    exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
-                elif not isinstance(exc_info, tuple):
-                    exc_info = sys.exc_info()
-            record = self._logger.makeRecord(self._logger.name, level, fn, lno, msg, args, exc_info, func, extra, sinfo)
-            self._logger.handle(record)
-        if trace or log_only or msg.startswith("|"):
-            self._formatter()
+    def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1, caller=None):
+        buffer = self.current_buffer()
+        if buffer is not None:
+            if exc_info and not isinstance(exc_info, (BaseException, tuple)):
+                exc_info = sys.exc_info()
+            kwargs = {"exc_info": exc_info, "extra": extra, "stack_info": stack_info, "stacklevel": stacklevel}
+            buffer.append((level, msg, args, kwargs, caller if caller else self.findCaller(stack_info, stacklevel)))
+            return
+        with self._emit_lock:
+            trace = level == TRACE
+            log_only = False
+            if trace:
+                level = DEBUG
+            if trace or msg.startswith("|"):
+                self._formatter(trace=trace, border=not msg.startswith("|"))
+            if self.spacing > 0:
+                self.exorcise()
+            if "\n" in msg:
+                for i, line in enumerate(msg.split("\n")):
+                    self._log(level, line, args, exc_info=exc_info, extra=extra, stack_info=stack_info, stacklevel=stacklevel, caller=caller)
+                    if i == 0:
+                        self._formatter(log_only=True, space=True)
+                log_only = True
+            else:
+                for secret in self.secrets:
+                    if secret in msg:
+                        msg = msg.replace(secret, "(redacted)")
+                if "HTTPConnectionPool" in msg:
+                    msg = re.sub("HTTPConnectionPool\\((.*?)\\)", "HTTPConnectionPool(redacted)", msg)
+                if "HTTPSConnectionPool" in msg:
+                    msg = re.sub("HTTPSConnectionPool\\((.*?)\\)", "HTTPSConnectionPool(redacted)", msg)
+                if caller:
+                    fn, lno, func, sinfo = caller
+                else:
+                    try:
+                        if not _srcfile:
+                            raise ValueError
+                        fn, lno, func, sinfo = self.findCaller(stack_info, stacklevel)
+                    except ValueError:
+                        fn, lno, func, sinfo = "(unknown file)", 0, "(unknown function)", None
+                if exc_info:
+                    if isinstance(exc_info, BaseException):
+                        exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
+                    elif not isinstance(exc_info, tuple):
+                        exc_info = sys.exc_info()
+                record = self._logger.makeRecord(self._logger.name, level, fn, lno, msg, args, exc_info, func, extra, sinfo)
+                self._logger.handle(record)
+            if trace or log_only or msg.startswith("|"):
+                self._formatter()
 
     def findCaller(self, stack_info=False, stacklevel=1):
         f = logging.currentframe()
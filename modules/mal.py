@@ -87,6 +87,7 @@ class MyAnimeList:
         self.config_path = params["config_path"]
         self.expiration = params["cache_expiration"]
         self.authorization = params["authorization"]
+        self.memo = util.LRUCache("MyAnimeList", config.general["memory_cache_size"])
         logger.secret(self.client_secret)
         try:
             if not self._save(self.authorization):
@@ -285,11 +286,14 @@ class MyAnimeList:
         return mal_ids
 
     def get_anime(self, mal_id):
+        mal = self.memo.get(mal_id)
+        if mal is not None:
+            return mal
         expired = None
         if self.config.Cache:
             mal_dict, expired = self.config.Cache.query_mal(mal_id, self.expiration)
             if mal_dict and expired is False:
-                return MyAnimeListObj(self, mal_id, mal_dict, cache=True)
+                return self.memo.put(mal_id, MyAnimeListObj(self, mal_id, mal_dict, cache=True))
         try:
             response = self._jikan_request(f"anime/{mal_id}")
         except JSONDecodeError:
@@ -299,7 +303,7 @@ class MyAnimeList:
         mal = MyAnimeListObj(self, mal_id, response["data"])
         if self.config.Cache:
             self.config.Cache.update_mal(expired, mal_id, mal, self.expiration)
-        return mal
+        return self.memo.put(mal_id, mal)
 
     def get_mal_ids(self, method, data):
         if method == "mal_id":
@@ -71,6 +71,7 @@ class Mdblist:
         self.apikey = None
         self.expiration = 60
         self.limit = False
+        self.memo = util.LRUCache("MdbList", config.general["memory_cache_size"])
 
     def add_key(self, apikey, expiration):
         self.apikey = apikey
@@ -88,7 +89,7 @@ class Mdblist:
     def has_key(self):
         return self.apikey is not None
 
-    def _request(self, imdb_id=None, tmdb_id=None, tvdb_id=None, is_movie=True, ignore_cache=False):
+    def _request(self, imdb_id=None, tmdb_id=None, tvdb_id=None, is_movie=True, ignore_cache=False, refresh=False):
         params = {"apikey": self.apikey}
         if imdb_id:
             params["i"] = imdb_id
@@ -103,11 +104,17 @@ class Mdblist:
             key = f"{'tvm' if is_movie else 'tvs'}{tvdb_id}"
         else:
             raise Failed("MdbList Error: Either IMDb ID, TVDb ID, or TMDb ID and TMDb Type Required")
-        expired = None
-        if self.config.Cache and not ignore_cache:
+        if not ignore_cache and not refresh:
+            mdb = self.memo.get(key)
+            if mdb is not None:
+                return mdb
+        expired = True if refresh else None
+        if self.config.Cache and not ignore_cache and not refresh:
             mdb_dict, expired = self.config.Cache.query_mdb(key, self.expiration)
-            if mdb_dict and expired is False:
-                return MDbObj(mdb_dict)
+            if mdb_dict and (expired is False or self.config.Cache.revalidate(
+                    "MdbList", key, lambda: self._request(imdb_id=imdb_id, tmdb_id=tmdb_id, tvdb_id=tvdb_id, is_movie=is_movie, refresh=True)
+            )):
+                return self.memo.put(key, MDbObj(mdb_dict))
         logger.trace(f"ID: {key}")
         logger.trace(f"Params: {params}")
         try:
@@ -123,7 +130,7 @@ class Mdblist:
             mdb = MDbObj(response)
             if self.config.Cache and not ignore_cache:
                 self.config.Cache.update_mdb(expired, key, mdb, self.expiration)
-            return mdb
+            return mdb if refresh else self.memo.put(key, mdb)
 
     def get_imdb(self, imdb_id):
         return self._request(imdb_id=imdb_id)
@@ -48,22 +48,27 @@ class OMDb:
         self.apikey = params["apikey"]
         self.expiration = params["expiration"]
         self.limit = False
+        self.memo = util.LRUCache("OMDb", config.general["memory_cache_size"])
         logger.secret(self.apikey)
         self.get_omdb("tt0080684", ignore_cache=True)
 
-    def get_omdb(self, imdb_id, ignore_cache=False):
-        expired = None
-        if self.config.Cache and not ignore_cache:
+    def get_omdb(self, imdb_id, ignore_cache=False, refresh=False):
+        if not ignore_cache and not refresh:
+            omdb = self.memo.get(imdb_id)
+            if omdb is not None:
+                return omdb
+        expired = True if refresh else None
+        if self.config.Cache and not ignore_cache and not refresh:
             omdb_dict, expired = self.config.Cache.query_omdb(imdb_id, self.expiration)
-            if omdb_dict and expired is False:
-                return OMDbObj(imdb_id, omdb_dict)
+            if omdb_dict and (expired is False or self.config.Cache.revalidate("OMDb", imdb_id, lambda: self.get_omdb(imdb_id, refresh=True))):
+                return self.memo.put(imdb_id, OMDbObj(imdb_id, omdb_dict))
         logger.trace(f"IMDb ID: {imdb_id}")
         response = self.config.get(base_url, params={"i": imdb_id, "apikey": self.apikey})
         if response.status_code < 400:
             omdb = OMDbObj(imdb_id, response.json())
             if self.config.Cache and not ignore_cache:
                 self.config.Cache.update_omdb(expired, omdb, self.expiration)
-            return omdb
+            return omdb if refresh else self.memo.put(imdb_id, omdb)
         else:
             try:
                 error = response.json()['Error']
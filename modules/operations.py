@@ -1,4 +1,6 @@
 import os, re
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from modules import plex, util, anidb
 from modules.util import Failed, LimitReached, YAML
@@ -25,6 +27,60 @@ class Operations:
         self.config = config
         self.library = library
 
+    def read_ahead(self, items):
+        with ThreadPoolExecutor(max_workers=self.library.threads) as executor:
+            pending = deque()
+            for item in items:
+                pending.append((item, executor.submit(self._load_ahead, item)))
+                if len(pending) > self.library.threads * 4:
+                    item, future = pending.popleft()
+                    future.exception()
+                    yield item
+            while pending:
+                item, future = pending.popleft()
+                future.exception()
+                yield item
+
+    def backup_ahead(self, items, titles):
+        def backup_item(item):
+            try:
+                return item, self.library.get_locked_attributes(item, titles)
+            except Failed as e:
+                logger.error(e)
+                return item, None
+
+        with ThreadPoolExecutor(max_workers=self.library.threads) as executor:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(backup_item, item))
+                if len(pending) > self.library.threads * 4:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _load_ahead(self, item):
+        item = self.library.reload(item)
+        tmdb_id, tvdb_id, imdb_id = self.library.get_ids(item)
+        loads = []
+        if tmdb_id and any([o == "tmdb" for o in self.library.meta_operations]):
+            loads.append(lambda: self.config.TMDb.get_movie(tmdb_id) if self.library.is_movie else self.config.TMDb.get_show(tmdb_id))
+        if imdb_id and any([o == "omdb" for o in self.library.meta_operations]) and self.config.OMDb.limit is False:
+            loads.append(lambda: self.config.OMDb.get_omdb(imdb_id))
+        if tvdb_id and any([o == "tvdb" for o in self.library.meta_operations]):
+            loads.append(lambda: self.config.TVDb.get_tvdb_obj(tvdb_id, is_movie=self.library.is_movie))
+        if any([o and o.startswith("mdb") for o in self.library.meta_operations]) and self.config.Mdblist.limit is False:
+            if self.library.is_show and tvdb_id:
+                loads.append(lambda: self.config.Mdblist.get_series(tvdb_id))
+            elif tmdb_id:
+                loads.append(lambda: self.config.Mdblist.get_movie(tmdb_id))
+            elif imdb_id:
+                loads.append(lambda: self.config.Mdblist.get_imdb(imdb_id))
+        for load in loads:
+            try:
+                load()
+            except (Failed, LimitReached):
+                pass
+
     def run_operations(self):
         operation_start = datetime.now()
         logger.info("")
@@ -79,7 +135,10 @@ class Operations:
             logger.info(f"{len(tracks)} Tracks Processed; {num_edited} Blank Track Titles Updated")
 
         if self.library.items_library_operation:
-            items = self.library.get_all()
+            if self.library.incremental_sync and self.library.cached_items:
+                items = list(self.library.cached_items.values())
+            else:
+                items = self.library.get_all()
             radarr_adds = []
             sonarr_adds = []
             label_edits = {"add": {}, "remove": {}}
@@ -110,7 +169,7 @@ class Operations:
             if self.library.assets_for_all and not self.library.asset_directory:
                 logger.error("Asset Error: No Asset Directory for Assets For All")
 
-            for i, item in enumerate(items, 1):
+            for i, item in enumerate(self.read_ahead(self.library.prefetch(items)), 1):
                 logger.info("")
                 logger.info(f"Processing: {i}/{len(items)} {item.title}")
                 try:
@@ -762,102 +821,74 @@ class Operations:
                     _size = len(batch_edits.items())
                     for i, (tag_name, rating_keys) in enumerate(sorted(batch_edits.items()), 1):
                         logger.info(get_batch_info(i, _size, tag_attribute, len(rating_keys), display_value=tag_name, tag_type=edit_type))
-                        self.library.Plex.batchMultiEdits(self.library.load_list_from_cache(rating_keys))
-                        getattr(self.library.Plex, f"{edit_type}{tag_attribute}")(tag_name)
-                        self.library.Plex.saveMultiEdits()
+                        self.library.multi_edit(self.library.load_list_from_cache(rating_keys), f"{edit_type}{tag_attribute}", tag_name)
 
             for item_attr, _edits in rating_edits.items():
                 _size = len(rating_edits.items())
                 for i, (new_rating, rating_keys) in enumerate(sorted(_edits.items()), 1):
                     logger.info(get_batch_info(i, _size, item_attr, len(rating_keys), display_value=new_rating))
-                    self.library.Plex.batchMultiEdits(self.library.load_list_from_cache(rating_keys))
-                    self.library.Plex.editField(item_attr, new_rating)
-                    self.library.Plex.saveMultiEdits()
+                    self.library.multi_edit(self.library.load_list_from_cache(rating_keys), "editField", item_attr, new_rating)
 
             _size = len(content_edits.items())
             for i, (new_rating, rating_keys) in enumerate(sorted(content_edits.items()), 1):
                 logger.info(get_batch_info(i, _size, "contentRating", len(rating_keys), display_value=new_rating))
-                self.library.Plex.batchMultiEdits(self.library.load_list_from_cache(rating_keys))
-                self.library.Plex.editContentRating(new_rating)
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(self.library.load_list_from_cache(rating_keys), "editContentRating", new_rating)
 
             _size = len(studio_edits.items())
             for i, (new_studio, rating_keys) in enumerate(sorted(studio_edits.items()), 1):
                 logger.info(get_batch_info(i, _size, "studio", len(rating_keys), display_value=new_studio))
-                self.library.Plex.batchMultiEdits(self.library.load_list_from_cache(rating_keys))
-                self.library.Plex.editStudio(new_studio)
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(self.library.load_list_from_cache(rating_keys), "editStudio", new_studio)
 
             _size = len(available_edits.items())
             for i, (new_available, rating_keys) in enumerate(sorted(available_edits.items()), 1):
                 logger.info(get_batch_info(i, _size, "originallyAvailableAt", len(rating_keys), display_value=new_available))
-                self.library.Plex.batchMultiEdits(self.library.load_list_from_cache(rating_keys))
-                self.library.Plex.editOriginallyAvailable(new_available)
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(self.library.load_list_from_cache(rating_keys), "editOriginallyAvailable", new_available)
 
             _size = len(remove_edits.items())
             for i, (field_attr, rating_keys) in enumerate(remove_edits.items(), 1):
                 logger.info(get_batch_info(i, _size, field_attr, len(rating_keys), out_type="remov"))
-                self.library.Plex.batchMultiEdits(self.library.load_list_from_cache(rating_keys))
-                self.library.Plex.editField(field_attr, None, locked=True)
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(self.library.load_list_from_cache(rating_keys), "editField", field_attr, None, locked=True)
 
             _size = len(reset_edits.items())
             for i, (field_attr, rating_keys) in enumerate(reset_edits.items(), 1):
                 logger.info(get_batch_info(i, _size, field_attr, len(rating_keys), out_type="reset"))
-                self.library.Plex.batchMultiEdits(self.library.load_list_from_cache(rating_keys))
-                self.library.Plex.editField(field_attr, None, locked=False)
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(self.library.load_list_from_cache(rating_keys), "editField", field_attr, None, locked=False)
 
             _size = len(lock_edits.items())
             for i, (field_attr, rating_keys) in enumerate(lock_edits.items(), 1):
                 logger.info(get_batch_info(i, _size, field_attr, len(rating_keys), out_type="lock"))
-                self.library.Plex.batchMultiEdits(self.library.load_list_from_cache(rating_keys))
-                self.library.Plex._edit(**{f"{field_attr}.locked": 1})
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(self.library.load_list_from_cache(rating_keys), "_edit", **{f"{field_attr}.locked": 1})
 
             _size = len(unlock_edits.items())
             for i, (field_attr, rating_keys) in enumerate(unlock_edits.items(), 1):
                 logger.info(get_batch_info(i, _size, field_attr, len(rating_keys), out_type="unlock"))
-                self.library.Plex.batchMultiEdits(self.library.load_list_from_cache(rating_keys))
-                self.library.Plex._edit(**{f"{field_attr}.locked": 0})
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(self.library.load_list_from_cache(rating_keys), "_edit", **{f"{field_attr}.locked": 0})
 
             for item_attr, _edits in ep_rating_edits.items():
                 _size = len(_edits.items())
                 for i, (new_rating, rating_keys) in enumerate(sorted(_edits.items()), 1):
                     logger.info(get_batch_info(i, _size, item_attr, len(rating_keys), display_value=new_rating, is_episode=True))
-                    self.library.Plex.batchMultiEdits(rating_keys)
-                    self.library.Plex.editField(item_attr, new_rating)
-                    self.library.Plex.saveMultiEdits()
+                    self.library.multi_edit(rating_keys, "editField", item_attr, new_rating)
 
             _size = len(ep_remove_edits.items())
             for i, (field_attr, rating_keys) in enumerate(ep_remove_edits.items(), 1):
                 logger.info(get_batch_info(i, _size, field_attr, len(rating_keys), is_episode=True, out_type="remov"))
-                self.library.Plex.batchMultiEdits(rating_keys)
-                self.library.Plex.editField(field_attr, None, locked=True)
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(rating_keys, "editField", field_attr, None, locked=True)
 
             _size = len(ep_reset_edits.items())
             for i, (field_attr, rating_keys) in enumerate(ep_reset_edits.items(), 1):
                 logger.info(get_batch_info(i, _size, field_attr, len(rating_keys), is_episode=True, out_type="reset"))
-                self.library.Plex.batchMultiEdits(rating_keys)
-                self.library.Plex.editField(field_attr, None, locked=False)
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(rating_keys, "editField", field_attr, None, locked=False)
 
             _size = len(ep_lock_edits.items())
             for i, (field_attr, rating_keys) in enumerate(ep_lock_edits.items(), 1):
                 logger.info(get_batch_info(i, _size, field_attr, len(rating_keys), is_episode=True, out_type="lock"))
-                self.library.Plex.batchMultiEdits(rating_keys)
-                self.library.Plex._edit(**{f"{field_attr}.locked": 1})
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(rating_keys, "_edit", **{f"{field_attr}.locked": 1})
 
             _size = len(ep_unlock_edits.items())
             for i, (field_attr, rating_keys) in enumerate(ep_unlock_edits.items(), 1):
                 logger.info(get_batch_info(i, _size, field_attr, len(rating_keys), is_episode=True, out_type="unlock"))
-                self.library.Plex.batchMultiEdits(rating_keys)
-                self.library.Plex._edit(**{f"{field_attr}.locked": 0})
-                self.library.Plex.saveMultiEdits()
+                self.library.multi_edit(rating_keys, "_edit", **{f"{field_attr}.locked": 0})
 
             if self.library.Radarr and self.library.radarr_add_all_existing:
                 logger.info("")
@@ -1005,29 +1036,75 @@ class Operations:
                     if "year" in mv:
                         special_names[f"{mv['title']} ({mv['year']})"] = mk
             items = self.library.get_all(load=True)
-            titles = [i.title for i in items]
-            for i, item in enumerate(items, 1):
-                logger.ghost(f"Processing: {i}/{len(items)} {item.title}")
-                map_key, attrs = self.library.get_locked_attributes(item, titles)
-                if map_key in special_names:
-                    map_key = special_names[map_key]
-                og_dict = yaml.data["metadata"][map_key] if map_key in yaml.data["metadata"] and yaml.data["metadata"][map_key] and isinstance(yaml.data["metadata"][map_key], dict) else {}
-                if attrs or (self.library.metadata_backup["add_blank_entries"] and not og_dict):
-
-                    def loop_dict(looping, dest_dict):
-                        if not looping:
-                            return None
-                        for lk, lv in looping.items():
-                            if isinstance(lv, dict) and lk in dest_dict and dest_dict[lk] and isinstance(dest_dict[lk], dict):
-                                dest_dict[lk] = loop_dict(lv, dest_dict[lk])
-                            else:
-                                dest_dict[lk] = lv
-                        return dest_dict
-
-                    yaml.data["metadata"][map_key] = loop_dict(attrs, og_dict)
+            titles = Counter([i.title for i in items])
+
+            def loop_dict(looping, dest_dict):
+                if not looping:
+                    return None
+                for lk, lv in looping.items():
+                    if isinstance(lv, dict) and lk in dest_dict and dest_dict[lk] and isinstance(dest_dict[lk], dict):
+                        dest_dict[lk] = loop_dict(lv, dest_dict[lk])
+                    else:
+                        dest_dict[lk] = lv
+                return dest_dict
+
+            def indent(text):
+                return "".join([f"  {line}" if line.strip() else line for line in text.splitlines(True)])
+
+            backup_path = self.library.metadata_backup["path"]
+            temp_path = f"{backup_path}.tmp"
+            existing = yaml.data.pop("metadata")
+            written = {}
+            merged = False
+
+            def write_backup(fp, entries):
+                if yaml.data:
+                    yaml.yaml.dump(yaml.data, fp)
+                fp.write("metadata:\n")
+                for entry_key, entry in entries:
+                    yaml.yaml.dump({entry_key: entry}, fp, transform=indent)
+
+            try:
+                with open(temp_path, "w", encoding="utf-8") as fp:
+                    write_backup(fp, [])
+                    for i, (item, result) in enumerate(self.backup_ahead(items, titles), 1):
+                        logger.ghost(f"Processing: {i}/{len(items)} {item.title}")
+                        if result is None:
+                            continue
+                        map_key, attrs = result
+                        if map_key in special_names:
+                            map_key = special_names[map_key]
+                        source = written if map_key in written else existing
+                        og_dict = source[map_key] if map_key in source and source[map_key] and isinstance(source[map_key], dict) else {}
+                        if attrs or (self.library.metadata_backup["add_blank_entries"] and not og_dict):
+                            entry = loop_dict(attrs, og_dict)
+                        elif map_key in written:
+                            continue
+                        elif map_key in existing:
+                            entry = existing[map_key]
+                        else:
+                            continue
+                        if map_key in written:
+                            logger.debug(f"Metadata Backup: Merging duplicate entry {map_key} for {item.title}")
+                            written[map_key] = entry
+                            merged = True
+                            continue
+                        existing.pop(map_key, None)
+                        yaml.yaml.dump({map_key: entry}, fp, transform=indent)
+                        written[map_key] = entry
+                    for map_key, entry in existing.items():
+                        yaml.yaml.dump({map_key: entry}, fp, transform=indent)
+                        written[map_key] = entry
+                if merged:
+                    with open(temp_path, "w", encoding="utf-8") as fp:
+                        write_backup(fp, written.items())
+                os.replace(temp_path, backup_path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
             logger.exorcise()
-            yaml.save()
-            logger.info(f"{len(yaml.data['metadata'])} {self.library.type}{'s' if len(yaml.data['metadata']) > 1 else ''} Backed Up")
+            logger.info(f"{len(written)} {self.library.type}{'s' if len(written) > 1 else ''} Backed Up")
 
         operation_run_time = str(datetime.now() - operation_start).split('.')[0]
         logger.info("")
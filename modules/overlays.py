@@ -79,7 +79,7 @@ class Overlays:
                     poster = None
                     if self.config.Cache:
                         image, image_compare, overlay_compare = self.config.Cache.query_image_map(item.ratingKey, f"{self.library.image_table_name}_overlays")
-                    self.library.reload(item, force=True)
+                    item = self.library.reload(item, force=True)
 
                     overlay_compare = [] if overlay_compare is None else util.get_list(overlay_compare, split="|")
                     has_overlay = any([item_tag.tag.lower() == "overlay" for item_tag in self.library.item_labels(item)])
@@ -400,12 +400,12 @@ class Overlays:
 
                     builder.display_filters()
 
-                    for method, value in builder.builders:
+                    for method, value, get_ids in builder.gather_builders():
                         logger.debug("")
                         logger.debug(f"Builder: {method}: {value}")
                         logger.info("")
                         try:
-                            builder.filter_and_save_items(builder.gather_ids(method, value))
+                            builder.filter_and_save_items(get_ids())
                         except Failed as e:
                             if builder.ignore_blank_results:
                                 logger.info("")
@@ -1,7 +1,9 @@
-import os, plexapi, re, requests
+import math, os, plexapi, re, requests, threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from modules import builder, util
-from modules.library import Library
+from modules.library import ItemRecord, Library
 from modules.util import Failed, ImageData
 from PIL import Image
 from plexapi import utils
@@ -12,7 +14,7 @@ from plexapi.library import Role, FilterChoice
 from plexapi.playlist import Playlist
 from plexapi.server import PlexServer
 from plexapi.video import Movie, Show, Season, Episode
-from retrying import retry
+from modules.retry import retry
 from urllib import parse
 from xml.etree.ElementTree import ParseError
 
@@ -20,6 +22,9 @@ logger = util.logger
 
 builders = ["plex_all", "plex_watchlist", "plex_pilots", "plex_collectionless", "plex_search"]
 library_types = ["movie", "show", "artist"]
+max_container_size = 1000
+multi_edit_size = 500
+ParentRecord = namedtuple("ParentRecord", ["ratingKey", "title", "titleSort", "locations"])
 search_translation = {
     "episode_actor": "episode.actor",
     "episode_title": "episode.title",
@@ -437,6 +442,8 @@ class Plex(Library):
         self.url = self.plex["url"]
         self.token = self.plex["token"]
         self.timeout = self.plex["timeout"]
+        self.threads = self.plex["threads"]
+        self.reload_batch_size = self.plex["reload_batch_size"]
         logger.secret(self.url)
         logger.secret(self.token)
         try:
@@ -501,6 +508,10 @@ class Plex(Library):
         self.plex_pass = self.PlexServer.myPlexSubscription
         self._users = []
         self._all_items = []
+        self._all_items_lock = threading.Lock()
+        self._multi_edit_lock = threading.Lock()
+        self._reloaded = util.LRUCache(f"{self.name} Items", config.general["memory_cache_size"])
+        self._parents = {}
         self._account = None
         self.agent = self.Plex.agent
         self.scanner = self.Plex.scanner
@@ -541,11 +552,11 @@ class Plex(Library):
                 return []
         return self.fetchItems(args)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def search(self, title=None, sort=None, maxresults=None, libtype=None, **kwargs):
         return self.Plex.search(title=title, sort=sort, maxresults=maxresults, libtype=libtype, **kwargs)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def exact_search(self, title, libtype=None, year=None):
         terms = {"title=": title}
         if year:
@@ -553,11 +564,11 @@ class Plex(Library):
         return self.Plex.search(libtype=libtype, **terms)
 
     def fetch_item(self, item):
-        if isinstance(item, (Movie, Show, Season, Episode, Artist, Album, Track)):
+        if isinstance(item, (ItemRecord, Movie, Show, Season, Episode, Artist, Album, Track)):
             return self.reload(item)
         key = int(item)
         if key in self.cached_items:
-            return self.reload(self.cached_items[key][0])
+            return self.reload(self.cached_items[key])
         try:
             current = self.fetchItem(key)
             if isinstance(current, (Movie, Show, Season, Episode, Artist, Album, Track)):
@@ -566,45 +577,88 @@ class Plex(Library):
             logger.trace(e)
         raise Failed(f"Plex Error: Item {item} not found")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def fetchItem(self, data):
         return self.PlexServer.fetchItem(data)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def fetchItems(self, uri_args):
         return self.Plex.fetchItems(f"/library/sections/{self.Plex.key}/all{'' if uri_args is None else uri_args}")
 
+    @retry(retry_on_exception=util.retry_if_not_plex)
+    def _get_page(self, key, container_start, container_size):
+        data = self.Plex._server.query(key, headers={"X-Plex-Container-Start": str(container_start), "X-Plex-Container-Size": str(container_size)})
+        subresults = self.Plex.findItems(data, initpath=key)
+        total_size = utils.cast(int, data.attrib.get('totalSize') or data.attrib.get('size')) or len(subresults)
+
+        librarySectionID = utils.cast(int, data.attrib.get('librarySectionID'))
+        if librarySectionID:
+            for item in subresults:
+                item.librarySectionID = librarySectionID
+        return subresults, total_size
+
     def get_all(self, builder_level=None, load=False):
-        if load and builder_level in [None, "show", "artist", "movie"]:
-            self._all_items = []
-        if self._all_items and builder_level in [None, "show", "artist", "movie"]:
-            return self._all_items
+        if builder_level in [None, "show", "artist", "movie"]:
+            with self._all_items_lock:
+                if load or not self._all_items:
+                    self._all_items = self._load_all(builder_level)
+                return self._all_items
+        return self._load_all(builder_level)
+
+    def _load_all(self, builder_level=None):
         builder_type = builder_level if builder_level else self.Plex.TYPE
         if not builder_level:
             builder_level = self.type
         logger.info(f"Loading All {builder_level.capitalize()}s from Library: {self.name}")
-        key = f"/library/sections/{self.Plex.key}/all?includeGuids=1&type={utils.searchType(builder_type)}"
+        results = self._get_items(f"/library/sections/{self.Plex.key}/all?includeGuids=1&type={utils.searchType(builder_type)}")
+        logger.info(f"Loaded {len(results)} {builder_level.capitalize()}s")
+        return results
+
+    def get_changed(self, since):
+        logger.info(f"Loading {self.type}s Updated Since the Last Sync from Library: {self.name}")
+        results = self._get_items(f"/library/sections/{self.Plex.key}/all?includeGuids=1&type={utils.searchType(self.Plex.TYPE)}&updatedAt>>={since}")
+        logger.info(f"Loaded {len(results)} Updated {self.type}s")
+        return results
+
+    @retry(retry_on_exception=util.retry_if_not_plex)
+    def _get_key_page(self, key, container_start, container_size):
+        data = self.Plex._server.query(key, headers={"X-Plex-Container-Start": str(container_start), "X-Plex-Container-Size": str(container_size)})
+        rating_keys = [int(elem.attrib["ratingKey"]) for elem in data if "ratingKey" in elem.attrib]
+        return rating_keys, utils.cast(int, data.attrib.get('totalSize') or data.attrib.get('size')) or len(rating_keys)
+
+    def get_rating_key_set(self):
+        key = f"/library/sections/{self.Plex.key}/all?type={utils.searchType(self.Plex.TYPE)}"
+        rating_keys = set()
+        container_start = 0
+        total_size = 1
+        while container_start < total_size:
+            subresults, total_size = self._get_key_page(key, container_start, max_container_size)
+            if not subresults:
+                break
+            rating_keys.update(subresults)
+            container_start += max_container_size
+        return rating_keys
+
+    def _get_items(self, key):
         container_start = 0
         container_size = plexapi.X_PLEX_CONTAINER_SIZE
         results = []
         total_size = 1
         while total_size > len(results) and container_start <= total_size:
-            data = self.Plex._server.query(key, headers={"X-Plex-Container-Start": str(container_start), "X-Plex-Container-Size": str(container_size)})
-            subresults = self.Plex.findItems(data, initpath=key)
-            total_size = utils.cast(int, data.attrib.get('totalSize') or data.attrib.get('size')) or len(subresults)
-
-            librarySectionID = utils.cast(int, data.attrib.get('librarySectionID'))
-            if librarySectionID:
-                for item in subresults:
-                    item.librarySectionID = librarySectionID
-
+            subresults, total_size = self._get_page(key, container_start, container_size)
             results.extend(subresults)
+            self.index_parents(subresults)
             container_start += container_size
             logger.ghost(f"Loaded: {total_size if container_start > total_size else container_start}/{total_size}")
-
-        logger.info(f"Loaded {total_size} {builder_level.capitalize()}s")
-        if builder_level in [None, "show", "artist", "movie"]:
-            self._all_items = results
+            if self.threads > 1 and total_size > container_start:
+                page_size = min(max(container_size, math.ceil((total_size - container_start) / (self.threads * 4))), max_container_size)
+                with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                    pages = executor.map(lambda s: self._get_page(key, s, page_size)[0], range(container_start, total_size, page_size))
+                    for subresults in pages:
+                        results.extend(subresults)
+                        self.index_parents(subresults)
+                        logger.ghost(f"Loaded: {len(results)}/{total_size}")
+                break
         return results
 
     def upload_theme(self, collection, url=None, filepath=None):
@@ -614,11 +668,11 @@ class Plex(Library):
         elif filepath:
             self.PlexServer.query(key, method=self.PlexServer._session.post, data=open(filepath, 'rb').read())
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def create_playlist(self, name, items):
         return self.PlexServer.createPlaylist(name, items=items)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def moveItem(self, obj, item, after):
         try:
             obj.moveItem(item, after=after)
@@ -626,7 +680,7 @@ class Plex(Library):
             logger.error(e)
             raise Failed("Move Failed")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def query(self, method):
         return method()
 
@@ -637,30 +691,30 @@ class Plex(Library):
             logger.stacktrace()
             raise Failed(f"Plex Error: Failed to delete {obj.title}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def query_data(self, method, data):
         return method(data)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def tag_edit(self, item, attribute, data, locked=True, remove=False):
         return item.editTags(attribute, data, locked=locked, remove=remove)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry(retry_on_exception=util.retry_if_not_failed)
     def query_collection(self, item, collection, locked=True, add=True):
         if add:
             item.addCollection(collection, locked=locked)
         else:
             item.removeCollection(collection, locked=locked)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def collection_mode_query(self, collection, data):
         collection.modeUpdate(mode=data)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def collection_order_query(self, collection, data):
         collection.sortUpdate(sort=data)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def item_labels(self, item):
         try:
             return item.labels
@@ -672,7 +726,7 @@ class Plex(Library):
             if item.ratingKey in self.movie_rating_key_map:
                 return self.config.TMDb.get_movie(self.movie_rating_key_map[item.ratingKey]).poster_url
         elif isinstance(item, (Show, Season, Episode)):
-            check_key = item.ratingKey if isinstance(item, Show) else item.show().ratingKey
+            check_key = item.ratingKey if isinstance(item, Show) else int(item.parentRatingKey if isinstance(item, Season) else item.grandparentRatingKey)
             if check_key in self.show_rating_key_map:
                 tmdb_id = self.config.Convert.tvdb_to_tmdb(self.show_rating_key_map[check_key])
                 if isinstance(item, Show) and item.ratingKey in self.show_rating_key_map:
@@ -736,8 +790,7 @@ class Plex(Library):
 
     def load_from_cache(self, rating_key):
         if rating_key in self.cached_items:
-            item, _ = self.cached_items[rating_key]
-            return item
+            return self.cached_items[rating_key]
 
     def load_list_from_cache(self, rating_keys):
         item_list = []
@@ -747,28 +800,85 @@ class Plex(Library):
                 item_list.append(item)
         return item_list
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def reload(self, item, force=False):
-        is_full = False
-        if not force and item.ratingKey in self.cached_items:
-            item, is_full = self.cached_items[item.ratingKey]
-        try:
-            if not is_full or force:
-                self._reload(item)
-                self.cached_items[item.ratingKey] = (item, True)
-        except (BadRequest, NotFound) as e:
-            logger.stacktrace()
-            raise Failed(f"Item Failed to Load: {e}")
-        return item
-
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+        keep = item.ratingKey in self.cached_items or item.ratingKey in self._reloaded
+        full_item = self._reloaded.get(item.ratingKey) if keep and not force else None
+        if full_item is None:
+            try:
+                if item.ratingKey in self.cached_items:
+                    full_item = self.PlexServer.fetchItem(int(item.ratingKey))
+                    full_item._autoReload = False
+                else:
+                    full_item = self._reload(item)
+            except (BadRequest, NotFound) as e:
+                logger.stacktrace()
+                raise Failed(f"Item Failed to Load: {e}")
+            if keep:
+                self._reloaded.put(item.ratingKey, full_item)
+            self.index_parents([full_item])
+        return full_item
+
+    @retry(retry_on_exception=util.retry_if_not_plex)
+    def _reload_batch(self, rating_keys):
+        return self.PlexServer.fetchItems(f"/library/metadata/{','.join([str(k) for k in rating_keys])}")
+
+    def reload_items(self, items):
+        rating_keys = []
+        for item in items:
+            if hasattr(item, "ratingKey") and item.ratingKey not in self._reloaded and item.ratingKey not in rating_keys:
+                rating_keys.append(item.ratingKey)
+        for i in range(0, len(rating_keys), self.reload_batch_size):
+            try:
+                for full_item in self._reload_batch(rating_keys[i:i + self.reload_batch_size]):
+                    full_item._autoReload = False
+                    self._reloaded.put(full_item.ratingKey, full_item)
+                    self.index_parents([full_item])
+            except (BadRequest, NotFound) as e:
+                logger.trace(e)
+
+    def index_parents(self, items, force=False):
+        for item in items:
+            if isinstance(item, (Show, Artist)):
+                locations = tuple(object.__getattribute__(item, "locations"))
+                if locations or force:
+                    self._parents[item.ratingKey] = ParentRecord(item.ratingKey, object.__getattribute__(item, "title"), object.__getattribute__(item, "titleSort"), locations)
+
+    def get_parent(self, item):
+        key = int(item.parentRatingKey if isinstance(item, (Season, Album)) else item.grandparentRatingKey)
+        if key not in self._parents:
+            parent = self.fetchItem(key)
+            if not isinstance(parent, (Show, Artist)):
+                raise Failed(f"Plex Error: Parent of {item.title} not found")
+            self.index_parents([parent], force=True)
+        return self._parents[key]
+
+    def prefetch(self, items):
+        window = min(self.reload_batch_size, self._reloaded.size // 3)
+        if window < 2:
+            yield from items
+            return
+        items = list(items)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self.reload_items, items[:window])
+            for start in range(0, len(items), window):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.stacktrace()
+                    logger.debug(f"Plex Error: Prefetch Failed: {e}")
+                if start + window < len(items):
+                    future = executor.submit(self.reload_items, items[start + window:start + window * 2])
+                yield from items[start:start + window]
+
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def edit_query(self, item, edits, advanced=False):
         if advanced:
             item.editAdvanced(**edits)
         else:
             item.edit(**edits)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def _upload_image(self, item, image):
         try:
             if image.is_poster and image.is_url:
@@ -779,26 +889,28 @@ class Plex(Library):
                 item.uploadArt(url=image.location)
             else:
                 item.uploadArt(filepath=image.location)
-            self.reload(item, force=True)
+            self._reload(item)
+            if item.ratingKey in self._reloaded:
+                self._reloaded.put(item.ratingKey, item)
         except BadRequest as e:
             item.refresh()
             raise Failed(e)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def upload_poster(self, item, image, url=False):
         if url:
             item.uploadPoster(url=image)
         else:
             item.uploadPoster(filepath=image)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def upload_background(self, item, image, url=False):
         if url:
             item.uploadArt(url=image)
         else:
             item.uploadArt(filepath=image)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry(retry_on_exception=util.retry_if_not_failed)
     def get_actor_id(self, name):
         results = self.Plex.hubSearch(name)
         for result in results:
@@ -825,7 +937,7 @@ class Plex(Library):
             logger.debug(f"Search Attribute: {final_search}")
             raise Failed(f"Plex Error: plex_search attribute: {search_name} not supported")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def get_tags(self, tag):
         if isinstance(tag, str):
             match = re.match(r'(?:([a-zA-Z]*)\.)?([a-zA-Z]+)', tag)
@@ -846,7 +958,7 @@ class Plex(Library):
             items = [i for i in self.Plex.findItems(self.Plex._server.query(tag.key[:-7]), FilterChoice) if i.key not in keys]
         return items
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry(retry_on_exception=util.retry_if_not_plex)
     def _query(self, key, post=False, put=False):
         if post:                method = self.Plex._server._session.post
         elif put:               method = self.Plex._server._session.put
@@ -876,19 +988,25 @@ class Plex(Library):
         return self._account
 
     def playlist_report(self):
-        playlists = {}
-        def scan_user(server, username):
+        def scan_user(username, owner=False):
             try:
-                for playlist in server.playlists():
-                    if isinstance(playlist, Playlist):
-                        if playlist.title not in playlists:
-                            playlists[playlist.title] = []
-                        playlists[playlist.title].append(username)
+                server = self.PlexServer if owner else self.PlexServer.switchUser(username)
+                return [p.title for p in server.playlists() if isinstance(p, Playlist)]
             except requests.exceptions.ConnectionError:
-                pass
-        scan_user(self.PlexServer, self.account.title)
-        for user in self.users:
-            scan_user(self.PlexServer.switchUser(user), user)
+                return []
+            except Exception as e:
+                logger.error(f"Playlist Report Error: Failed to scan {username}'s playlists: {e}")
+                return []
+
+        usernames = [self.account.title] + self.users
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            results = list(executor.map(scan_user, usernames, [True] + [False] * len(self.users)))
+        playlists = {}
+        for username, titles in zip(usernames, results):
+            for title in titles:
+                if title not in playlists:
+                    playlists[title] = []
+                playlists[title].append(username)
         return playlists
 
     def manage_recommendations(self):
@@ -896,10 +1014,27 @@ class Plex(Library):
                  r._data.attrib.get('promotedToOwnHome'), r._data.attrib.get('promotedToSharedHome'))
                 for r in self.Plex.fetchItems(f"/hubs/sections/{self.Plex.key}/manage")]
 
+    @retry(retry_on_exception=util.retry_if_not_plex)
+    def multi_edit(self, items, attribute, *args, **kwargs):
+        with self._multi_edit_lock:
+            self.Plex.batchMultiEdits(items)
+            getattr(self.Plex, attribute)(*args, **kwargs)
+            self.Plex.saveMultiEdits()
+
     def alter_collection(self, items, collection, smart_label_collection=False, add=True):
-        self.Plex.batchMultiEdits(items)
-        self.query_data(getattr(self.Plex, f"{'add' if add else 'remove'}{'Label' if smart_label_collection else 'Collection'}"), collection)
-        self.Plex.saveMultiEdits()
+        items = items if isinstance(items, list) else [items]
+        attribute = f"{'add' if add else 'remove'}{'Label' if smart_label_collection else 'Collection'}"
+        for i in range(0, len(items), multi_edit_size):
+            batch = items[i:i + multi_edit_size]
+            try:
+                self.multi_edit(batch, attribute, collection)
+            except Exception as e:
+                logger.debug(f"Batch Edit Failed, editing {len(batch)} items individually: {e}")
+                for item in batch:
+                    try:
+                        self.query_data(getattr(item, attribute), collection)
+                    except Exception:
+                        logger.error(f"Plex Error: Failed to {'add' if add else 'remove'} {util.item_title(item)} {'to' if add else 'from'} {collection}")
 
     def move_item(self, collection, item, after=None):
         key = f"{collection.key}/items/{item}/move"
@@ -1370,10 +1505,8 @@ class Plex(Library):
 
         if not item_asset_directory:
             if isinstance(item, (Movie, Artist, Album, Show, Episode, Season)):
-                if isinstance(item, (Episode, Season)):
-                    starting = item.show()
-                elif isinstance(item, (Album, Track)):
-                    starting = item.artist()
+                if isinstance(item, (Episode, Season, Album, Track)):
+                    starting = self.get_parent(item)
                 else:
                     starting = item
                 if not starting.locations:
@@ -1474,11 +1607,12 @@ class Plex(Library):
             imdb_id = self.get_imdb_from_map(item)
         return tmdb_id, tvdb_id, imdb_id
 
-    def get_locked_attributes(self, item, titles=None):
-        item = self.reload(item)
+    def get_locked_attributes(self, item, titles=None, loaded=False):
+        if not loaded:
+            item = self.reload(item)
         attrs = {}
         fields = {f.name: f for f in item.fields if f.locked}
-        if isinstance(item, (Movie, Show)) and titles and titles.count(item.title) > 1:
+        if isinstance(item, (Movie, Show)) and titles and titles[item.title] > 1:
             map_key = f"{item.title} ({item.year})"
             attrs["title"] = item.title
             attrs["year"] = item.year
@@ -1544,10 +1678,21 @@ class Plex(Library):
 
         def _recur(sub):
             sub_items = {}
-            for sub_item in getattr(item, sub)():
-                sub_item_key, sub_item_attrs = self.get_locked_attributes(sub_item)
-                if sub_item_attrs:
-                    sub_items[sub_item_key] = sub_item_attrs
+            children = getattr(item, sub)()
+            for i in range(0, len(children), self.reload_batch_size):
+                batch = children[i:i + self.reload_batch_size]
+                try:
+                    full_items = {c.ratingKey: c for c in self._reload_batch([c.ratingKey for c in batch])}
+                except (BadRequest, NotFound) as e:
+                    logger.trace(e)
+                    full_items = {}
+                for sub_item in batch:
+                    if sub_item.ratingKey in full_items:
+                        sub_item = full_items[sub_item.ratingKey]
+                        sub_item._autoReload = False
+                    sub_item_key, sub_item_attrs = self.get_locked_attributes(sub_item, loaded=sub_item.ratingKey in full_items)
+                    if sub_item_attrs:
+                        sub_items[sub_item_key] = sub_item_attrs
             if sub_items:
                 attrs[sub] = sub_items
 
@@ -1564,11 +1709,11 @@ class Plex(Library):
 
     def get_item_sort_title(self, item_to_sort, atr="titleSort"):
         if isinstance(item_to_sort, Album):
-            return f"{getattr(item_to_sort.artist(), atr)} Album {getattr(item_to_sort, atr)}"
+            return f"{getattr(self.get_parent(item_to_sort), atr)} Album {getattr(item_to_sort, atr)}"
         elif isinstance(item_to_sort, Season):
-            return f"{getattr(item_to_sort.show(), atr)} Season {item_to_sort.seasonNumber}"
+            return f"{getattr(self.get_parent(item_to_sort), atr)} Season {item_to_sort.seasonNumber}"
         elif isinstance(item_to_sort, Episode):
-            return f"{getattr(item_to_sort.show(), atr)} {item_to_sort.seasonEpisode.upper()}"
+            return f"{getattr(self.get_parent(item_to_sort), atr)} {item_to_sort.seasonEpisode.upper()}"
         else:
             return getattr(item_to_sort, atr)
 
@@ -0,0 +1,124 @@
+import random, threading, time
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import wraps
+from urllib.parse import urlparse
+from modules import util
+from modules.util import CircuitOpen
+
+logger = util.logger
+
+max_attempts = 6
+backoff_base = 2
+backoff_max = 30
+retry_after_max = 120
+retry_statuses = [429, 503]
+breaker_threshold = 10
+breaker_timeout = 120
+
+class Breaker:
+    def __init__(self):
+        self.failures = 0
+        self.opened = None
+        self.testing = False
+
+class RetryPolicy:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.retries = Counter()
+        self.waited = Counter()
+        self.skipped = Counter()
+        self._breakers = {}
+
+    def check(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None or breaker.opened is None:
+                return
+            if breaker.testing or time.time() - breaker.opened < breaker_timeout:
+                self.skipped[host] += 1
+                raise CircuitOpen(f"Connection Error: Skipping request to {host} after {breaker.failures} consecutive errors")
+            breaker.testing = True
+
+    def success(self, host):
+        with self._lock:
+            breaker = self._breakers.pop(host, None)
+        if breaker and breaker.opened is not None:
+            logger.info(f"Connection to {host} restored")
+
+    def failure(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = Breaker()
+            breaker = self._breakers[host]
+            breaker.failures += 1
+            breaker.testing = False
+            if breaker.failures >= breaker_threshold:
+                if breaker.opened is None:
+                    logger.warning(f"Connection Error: {breaker.failures} consecutive errors from {host}, pausing requests for {breaker_timeout} seconds")
+                breaker.opened = time.time()
+
+    def wait_time(self, attempt, response=None):
+        if response is not None and response.headers.get("Retry-After"):
+            retry_after = response.headers["Retry-After"]
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                try:
+                    wait = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    wait = None
+            if wait is not None:
+                return min(max(wait, 0), retry_after_max)
+        backoff = min(backoff_max, backoff_base * 2 ** (attempt - 1))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def sleep(self, host, wait):
+        with self._lock:
+            self.retries[host] += 1
+            self.waited[host] += wait
+        time.sleep(wait)
+
+policy = RetryPolicy()
+
+def _host(args, kwargs):
+    for value in [getattr(args[0], "url", None) if args else None, kwargs.get("url")] + list(args[1:2]):
+        if isinstance(value, str) and value.startswith("http"):
+            return urlparse(value).netloc
+    return "unknown"
+
+def retry(retry_on_exception=None):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            host = _host(args, kwargs)
+            attempt = 0
+            while True:
+                attempt += 1
+                policy.check(host)
+                response = None
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    if retry_on_exception and not retry_on_exception(e):
+                        policy.success(host)
+                        raise
+                    policy.failure(host)
+                    if attempt >= max_attempts:
+                        raise
+                    logger.debug(f"Retrying {func.__name__} ({attempt}/{max_attempts - 1}): {e}")
+                else:
+                    if attempt >= max_attempts or getattr(result, "status_code", None) not in retry_statuses:
+                        policy.success(host)
+                        return result
+                    if result.status_code != 429:
+                        policy.failure(host)
+                    response = result
+                    logger.debug(f"Retrying {func.__name__} ({attempt}/{max_attempts - 1}): ({result.status_code}) {result.reason}")
+                policy.sleep(host, policy.wait_time(attempt, response=response))
+        return wrapper
+    return decorator
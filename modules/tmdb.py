@@ -108,13 +108,16 @@ class TMDBObj:
 
 
 class TMDbMovie(TMDBObj):
-    def __init__(self, tmdb, tmdb_id, ignore_cache=False):
+    def __init__(self, tmdb, tmdb_id, ignore_cache=False, refresh=False):
         super().__init__(tmdb, tmdb_id, ignore_cache=ignore_cache)
-        expired = None
+        expired = True if refresh else None
+        stale = False
         data = None
-        if self._tmdb.config.Cache and not ignore_cache:
+        if self._tmdb.config.Cache and not ignore_cache and not refresh:
             data, expired = self._tmdb.config.Cache.query_tmdb_movie(tmdb_id, self._tmdb.expiration)
-        if expired or not data:
+            if data and expired:
+                stale = self._tmdb.config.Cache.revalidate("TMDb", f"movie-{tmdb_id}", lambda: TMDbMovie(tmdb, tmdb_id, refresh=True))
+        if (expired and not stale) or not data:
             data = self.load_movie()
         super()._load(data)
 
@@ -124,7 +127,7 @@ class TMDbMovie(TMDBObj):
         self.collection_id = data["collection_id"] if isinstance(data, dict) else data.collection.id if data.collection else None
         self.collection_name = data["collection_name"] if isinstance(data, dict) else data.collection.name if data.collection else None
 
-        if self._tmdb.config.Cache and not ignore_cache:
+        if self._tmdb.config.Cache and not ignore_cache and not stale:
             self._tmdb.config.Cache.update_tmdb_movie(expired, self, self._tmdb.expiration)
 
     @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
@@ -139,13 +142,16 @@ class TMDbMovie(TMDBObj):
 
 
 class TMDbShow(TMDBObj):
-    def __init__(self, tmdb, tmdb_id, ignore_cache=False):
+    def __init__(self, tmdb, tmdb_id, ignore_cache=False, refresh=False):
         super().__init__(tmdb, tmdb_id, ignore_cache=ignore_cache)
-        expired = None
+        expired = True if refresh else None
+        stale = False
         data = None
-        if self._tmdb.config.Cache and not ignore_cache:
+        if self._tmdb.config.Cache and not ignore_cache and not refresh:
             data, expired = self._tmdb.config.Cache.query_tmdb_show(tmdb_id, self._tmdb.expiration)
-        if expired or not data:
+            if data and expired:
+                stale = self._tmdb.config.Cache.revalidate("TMDb", f"show-{tmdb_id}", lambda: TMDbShow(tmdb, tmdb_id, refresh=True))
+        if (expired and not stale) or not data:
             data = self.load_show()
         super()._load(data)
 
@@ -161,7 +167,7 @@ class TMDbShow(TMDBObj):
         loop = data.seasons if not isinstance(data, dict) else data["seasons"].split("|") if data["seasons"] else [] # noqa
         self.seasons = [TMDbSeason(s) for s in loop]
 
-        if self._tmdb.config.Cache and not ignore_cache:
+        if self._tmdb.config.Cache and not ignore_cache and not stale:
             self._tmdb.config.Cache.update_tmdb_show(expired, self, self._tmdb.expiration)
 
     @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
@@ -181,6 +187,7 @@ class TMDb:
         self.language = params["language"]
         self.region = None
         self.expiration = params["expiration"]
+        self.memo = util.LRUCache("TMDb", config.general["memory_cache_size"])
         logger.secret(self.apikey)
         try:
             self.TMDb = TMDbAPIs(self.apikey, language=self.language, session=self.config.session)
@@ -229,10 +236,20 @@ class TMDb:
         else:                           return self.get_show(tmdb_id)
 
     def get_movie(self, tmdb_id, ignore_cache=False):
-        return TMDbMovie(self, tmdb_id, ignore_cache=ignore_cache)
+        tmdb_id = util.check_num(tmdb_id) or tmdb_id
+        key = f"movie-{tmdb_id}"
+        movie = None if ignore_cache else self.memo.get(key)
+        if movie is None:
+            movie = self.memo.put(key, TMDbMovie(self, tmdb_id, ignore_cache=ignore_cache))
+        return movie
 
     def get_show(self, tmdb_id, ignore_cache=False):
-        return TMDbShow(self, tmdb_id, ignore_cache=ignore_cache)
+        tmdb_id = util.check_num(tmdb_id) or tmdb_id
+        key = f"show-{tmdb_id}"
+        show = None if ignore_cache else self.memo.get(key)
+        if show is None:
+            show = self.memo.put(key, TMDbShow(self, tmdb_id, ignore_cache=ignore_cache))
+        return show
 
     @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
     def get_season(self, tmdb_id, season_number, partial=None):
@@ -1,4 +1,6 @@
-import glob, os, re, requests, ruamel.yaml, signal, sys, time
+import bisect, glob, os, re, requests, ruamel.yaml, signal, sys, threading, time
+from array import array
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from modules.logs import MyLogger
 from num2words import num2words
@@ -28,6 +30,9 @@ class Failed(Exception):
 class FilterFailed(Failed):
     pass
 
+class CircuitOpen(Failed):
+    pass
+
 class Continue(Exception):
     pass
 
@@ -56,6 +61,181 @@ class ImageData:
     def __str__(self):
         return str(self.__dict__)
 
+class LRUCache:
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def put(self, key, value):
+        if self.size < 1 or value is None:
+            return value
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total * 100 if total else 0
+
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+class IntMap:
+    def __init__(self, pairs=None):
+        self._keys = array("q")
+        self._values = array("q")
+        for key, value in sorted(pairs, key=lambda p: p[0]) if pairs else []:
+            if self._keys and self._keys[-1] == key:
+                self._values[-1] = value
+            else:
+                self._keys.append(key)
+                self._values.append(value)
+
+    @classmethod
+    def fromfile(cls, f, size):
+        int_map = cls()
+        int_map._keys.fromfile(f, size)
+        int_map._values.fromfile(f, size)
+        return int_map
+
+    def tofile(self, f):
+        self._keys.tofile(f)
+        self._values.tofile(f)
+
+    def _index(self, key):
+        try:
+            key = int(key)
+        except (TypeError, ValueError):
+            return None
+        i = bisect.bisect_left(self._keys, key)
+        return i if i < len(self._keys) and self._keys[i] == key else None
+
+    def get(self, key, default=None):
+        i = self._index(key)
+        return default if i is None else self._values[i]
+
+    def __contains__(self, key):
+        return self._index(key) is not None
+
+    def __getitem__(self, key):
+        i = self._index(key)
+        if i is None:
+            raise KeyError(key)
+        return self._values[i]
+
+    def __len__(self):
+        return len(self._keys)
+
+class ItemSet:
+    def __init__(self, items=None):
+        self._data = OrderedDict()
+        self._list = None
+        if items:
+            self.update(items)
+
+    @staticmethod
+    def key(item):
+        return item if isinstance(item, (int, str)) else item.ratingKey
+
+    def add(self, item):
+        key = self.key(item)
+        if key in self._data:
+            return False
+        self._data[key] = item
+        self._list = None
+        return True
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def discard(self, item):
+        if self._data.pop(self.key(item), None) is not None:
+            self._list = None
+
+    def diff(self, other):
+        other = other if isinstance(other, ItemSet) else ItemSet(other)
+        to_add, unchanged = ItemSet(), ItemSet()
+        for key, item in self._data.items():
+            (unchanged if key in other._data else to_add)._data[key] = item
+        return to_add, unchanged, ItemSet([i for k, i in other._data.items() if k not in self._data])
+
+    def items(self):
+        if self._list is None:
+            self._list = list(self._data.values())
+        return self._list
+
+    def __contains__(self, item):
+        return self.key(item) in self._data
+
+    def __iter__(self):
+        return iter(self.items())
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ItemSet(self.items()[index])
+        return self.items()[index]
+
+def longest_increasing_subsequence(values):
+    tails = []
+    tail_indexes = []
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        pos = bisect.bisect_left(tails, value)
+        if pos > 0:
+            previous[i] = tail_indexes[pos - 1]
+        if pos == len(tails):
+            tails.append(value)
+            tail_indexes.append(i)
+        else:
+            tails[pos] = value
+            tail_indexes[pos] = i
+    indexes = []
+    i = tail_indexes[-1] if tail_indexes else None
+    while i is not None:
+        indexes.append(i)
+        i = previous[i]
+    return indexes[::-1]
+
 def retry_if_not_failed(exception):
     return not isinstance(exception, Failed)
 
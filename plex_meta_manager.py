@@ -1,6 +1,6 @@
-import argparse, os, platform, re, sys, time, uuid
+import argparse, os, platform, re, sys, threading, time, uuid
 from collections import Counter
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from modules.logs import MyLogger
 
@@ -41,6 +41,9 @@ arguments = {
     "run-files": {"args": ["rf", "rm", "m", "run-file", "metadata", "metadata-files", "run-metadata-files"], "type": "str", "help": "Process only specified Files (pipe-separated list '|')"},
     "ignore-schedules": {"args": "is", "type": "bool", "help": "Run ignoring collection schedules"},
     "ignore-ghost": {"args": "ig", "type": "bool", "help": "Run ignoring ghost logging"},
+    "cache-maintenance": {"args": ["cm", "cache-vacuum"], "type": "bool", "help": "Run Cache Maintenance at the end of the run"},
+    "cache-export": {"args": ["ce", "export-cache"], "type": "str", "help": "Export the shareable cache tables to a snapshot file"},
+    "cache-import": {"args": ["ci", "import-cache"], "type": "str", "help": "Merge a cache snapshot file into the cache before running"},
     "delete-collections": {"args": ["dc", "delete", "delete-collection"], "type": "bool", "help": "Deletes all Collections in the Plex Library before running"},
     "delete-labels": {"args": ["dl", "delete-label"], "type": "bool", "help": "Deletes all Labels in the Plex Library before running"},
     "resume": {"args": "re", "type": "str", "help": "Resume collection run from a specific collection"},
@@ -171,6 +174,7 @@ from modules import util
 util.logger = logger
 from modules.builder import CollectionBuilder
 from modules.config import ConfigFile
+from modules.retry import policy as retry_policy
 from modules.util import Failed, FilterFailed, NonExisting, NotScheduled, Deleted
 
 def my_except_hook(exctype, value, tb):
@@ -190,6 +194,10 @@ def new_send(*send_args, **kwargs):
 
 requests.Session.send = new_send
 
+arr_lock = threading.Lock()
+collection_dependencies = ["collection", "season_collection", "episode_collection"]
+item_edit_attributes = ["smart_label"]
+
 version = ("Unknown", "Unknown", 0)
 with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "VERSION")) as handle:
     for line in handle.readlines():
@@ -255,6 +263,7 @@ def start(attrs):
     elif "libraries" in attrs and attrs["libraries"]:       start_type = "Libraries "
     else:                                                   start_type = ""
     start_time = datetime.now()
+    retry_policy.reset()
     if "time" not in attrs:
         attrs["time"] = start_time.strftime("%H:%M")
     attrs["time_obj"] = start_time
@@ -262,6 +271,7 @@ def start(attrs):
     attrs["branch"] = branch
     attrs["config_file"] = run_args["config"]
     attrs["ignore_schedules"] = run_args["ignore-schedules"]
+    attrs["cache_maintenance"] = run_args["cache-maintenance"]
     attrs["read_only"] = run_args["read-only-config"]
     attrs["no_missing"] = run_args["no-missing"]
     attrs["no_report"] = run_args["no-report"]
@@ -299,6 +309,9 @@ def start(attrs):
             config.notify(e)
             logger.stacktrace()
             logger.critical(e)
+        finally:
+            if config.Cache:
+                config.Cache.close()
     logger.info("")
     end_time = datetime.now()
     run_time = str(end_time - start_time).split(".")[0]
@@ -471,6 +484,16 @@ def run_config(config, stats):
                 if library.optimize:
                     library.query(library.PlexServer.library.optimize)
 
+    if config.cache_maintenance:
+        logger.info("")
+        logger.separator("Cache Maintenance")
+        logger.info("")
+        try:
+            config.Cache.maintenance(expiration=max([api.expiration for api in [config.TMDb, config.OMDb, config.Mdblist, config.AniDB, config.MyAnimeList] if api]))
+        except Exception as e:
+            logger.stacktrace()
+            logger.error(f"Cache Maintenance Error: {e}")
+
     longest = 20
     for library in config.libraries:
         for title in library.status:
@@ -510,6 +533,24 @@ def run_config(config, stats):
         logger.separator(f"Playlists Summary", space=False, border=False)
         logger.info("")
         print_status(playlist_status)
+    memos = [api.memo for api in [config.TMDb, config.OMDb, config.Mdblist, config.AniDB, config.MyAnimeList] if api]
+    if any([memo.hits or memo.misses for memo in memos]):
+        logger.info("")
+        logger.separator(f"Memory Cache Summary", space=False, border=False)
+        logger.info("")
+        logger.info(f"{'Provider':<11} |  Hits  | Misses | Evicted | Hit Rate")
+        logger.separator(f"{logger.separating_character * 11}|{logger.separating_character * 8}|{logger.separating_character * 8}|{logger.separating_character * 9}|", space=False, border=False, side_space=False, left=True)
+        for memo in memos:
+            logger.info(f"{memo.name:<11} | {memo.hits:>6} | {memo.misses:>6} | {memo.evictions:>7} | {memo.hit_rate:>7.1f}%")
+    hosts = sorted(set(retry_policy.retries) | set(retry_policy.skipped))
+    if hosts:
+        logger.info("")
+        logger.separator(f"Retry Summary", space=False, border=False)
+        logger.info("")
+        logger.info(f"{'Host':<30} | Retries | Waited | Skipped")
+        logger.separator(f"{logger.separating_character * 31}|{logger.separating_character * 9}|{logger.separating_character * 8}|", space=False, border=False, side_space=False, left=True)
+        for host in hosts:
+            logger.info(f"{host[:30]:<30} | {retry_policy.retries[host]:>7} | {retry_policy.waited[host]:>5.0f}s | {retry_policy.skipped[host]:>7}")
 
     stats["added"] += amount_added
     for library in config.libraries:
@@ -701,8 +742,8 @@ def run_libraries(config):
 
 def run_collection(config, library, metadata, requested_collections):
     logger.info("")
+    to_run = []
     for mapping_name, collection_attrs in requested_collections.items():
-        collection_start = datetime.now()
         if run_args["tests"] and ("test" not in collection_attrs or collection_attrs["test"] is not True):
             no_template_test = True
             if "template" in collection_attrs and collection_attrs["template"]:
@@ -731,159 +772,226 @@ def run_collection(config, library, metadata, requested_collections):
             collection_log_name, output_str = util.validate_filename(mapping_name)
         #logger.add_collection_handler(library.mapping_name, collection_log_name)
         library.status[str(mapping_name)] = {"status": "Unchanged", "errors": [], "added": 0, "unchanged": 0, "removed": 0, "radarr": 0, "sonarr": 0}
+        to_run.append((mapping_name, collection_attrs, output_str))
 
-        try:
-            builder = CollectionBuilder(config, metadata, mapping_name, collection_attrs, library=library, extra=output_str)
+    def merge(results):
+        stats, builder, run_again = results
+        for key, value in stats.items():
+            library.stats[key] += value
+        if builder is not None:
             library.stats["names"].append(builder.name)
             if builder.build_collection:
                 library.collection_names.append(builder.name)
-            logger.info("")
+            if run_again:
+                library.run_again.append(builder)
 
-            logger.separator(f"Running {builder.name} Collection", space=False, border=False)
+    if config.general["collection_threads"] < 2 or len(to_run) < 2:
+        for mapping_name, collection_attrs, output_str in to_run:
+            merge(run_single_collection(config, library, metadata, mapping_name, collection_attrs, output_str))
+        return
 
-            if len(builder.schedule) > 0:
-                logger.info(builder.schedule)
+    def run_buffered(*args):
+        logger.start_buffer()
+        try:
+            results = run_single_collection(*args)
+        finally:
+            records = logger.end_buffer()
+        return records, results
+
+    def emit(future):
+        records, results = future.result()
+        logger.replay(records)
+        merge(results)
+
+    with ThreadPoolExecutor(max_workers=config.general["collection_threads"]) as executor:
+        pending = []
+        for mapping_name, collection_attrs, output_str in to_run:
+            if has_collection_dependency(metadata, collection_attrs):
+                for future in pending:
+                    emit(future)
+                pending = []
+                merge(run_single_collection(config, library, metadata, mapping_name, collection_attrs, output_str))
+            else:
+                pending.append(executor.submit(run_buffered, config, library, metadata, mapping_name, collection_attrs, output_str))
+        for future in pending:
+            emit(future)
+
+def has_collection_dependency(metadata, collection_attrs):
+    def _check(data):
+        if isinstance(data, dict):
+            for key, value in data.items():
+                attr = str(key).split(".")[0]
+                if str(key) == "plex_collectionless" or attr in collection_dependencies or attr in item_edit_attributes \
+                        or attr.startswith("item_") or _check(value):
+                    return True
+        elif isinstance(data, list):
+            return any(_check(d) for d in data)
+        return False
+    if _check(collection_attrs):
+        return True
+    if "template" in collection_attrs and collection_attrs["template"] and metadata.templates:
+        for data_template in util.get_list(collection_attrs["template"], split=False):
+            if isinstance(data_template, dict) and "name" in data_template and data_template["name"] in metadata.templates \
+                    and _check(metadata.templates[data_template["name"]][0]):
+                return True
+    return False
 
-            if len(builder.smart_filter_details) > 0:
-                logger.info("")
-                logger.info(builder.smart_filter_details)
-                logger.info("")
-                logger.info(f"Items Found: {builder.beginning_count}")
+def run_single_collection(config, library, metadata, mapping_name, collection_attrs, output_str):
+    collection_start = datetime.now()
+    stats = Counter()
+    builder = None
+    run_again = False
+    try:
+        builder = CollectionBuilder(config, metadata, mapping_name, collection_attrs, library=library, extra=output_str)
+        logger.info("")
 
-            items_added = 0
-            items_removed = 0
-            if not builder.smart_url and builder.builders and not builder.blank_collection:
-                logger.info("")
-                logger.info(f"Sync Mode: {'sync' if builder.sync else 'append'}")
+        logger.separator(f"Running {builder.name} Collection", space=False, border=False)
 
-                for method, value in builder.builders:
-                    logger.debug("")
-                    logger.debug(f"Builder: {method}: {value}")
-                    logger.info("")
-                    try:
-                        builder.filter_and_save_items(builder.gather_ids(method, value))
-                    except Failed as e:
-                        if builder.ignore_blank_results:
-                            logger.warning(e)
-                        else:
-                            raise Failed(e)
+        if len(builder.schedule) > 0:
+            logger.info(builder.schedule)
 
-                builder.display_filters()
+        if len(builder.smart_filter_details) > 0:
+            logger.info("")
+            logger.info(builder.smart_filter_details)
+            logger.info("")
+            logger.info(f"Items Found: {builder.beginning_count}")
 
-                if len(builder.found_items) > 0 and len(builder.found_items) + builder.beginning_count >= builder.minimum and builder.build_collection:
-                    items_added, items_unchanged = builder.add_to_collection()
-                    library.stats["added"] += items_added
-                    library.status[str(mapping_name)]["added"] = items_added
-                    library.stats["unchanged"] += items_unchanged
-                    library.status[str(mapping_name)]["unchanged"] = items_unchanged
-                    items_removed = 0
-                    if builder.sync:
-                        items_removed = builder.sync_collection()
-                        library.stats["removed"] += items_removed
-                        library.status[str(mapping_name)]["removed"] = items_removed
+        items_added = 0
+        items_removed = 0
+        if not builder.smart_url and builder.builders and not builder.blank_collection:
+            logger.info("")
+            logger.info(f"Sync Mode: {'sync' if builder.sync else 'append'}")
 
-                if builder.do_missing and (len(builder.missing_movies) > 0 or len(builder.missing_shows) > 0):
-                    radarr_add, sonarr_add = builder.run_missing()
-                    library.stats["radarr"] += radarr_add
-                    library.status[str(mapping_name)]["radarr"] += radarr_add
-                    library.stats["sonarr"] += sonarr_add
-                    library.status[str(mapping_name)]["sonarr"] += sonarr_add
+            for method, value, get_ids in builder.gather_builders():
+                logger.debug("")
+                logger.debug(f"Builder: {method}: {value}")
+                logger.info("")
+                try:
+                    builder.filter_and_save_items(get_ids())
+                except Failed as e:
+                    if builder.ignore_blank_results:
+                        logger.warning(e)
+                    else:
+                        raise Failed(e)
 
-                if not builder.found_items and not builder.ignore_blank_results:
-                    raise NonExisting(f"{builder.Type} Warning: No items found")
+            builder.display_filters()
 
-            valid = True
-            if builder.build_collection and not builder.blank_collection and items_added + builder.beginning_count < builder.minimum:
-                logger.info("")
-                logger.info(f"{builder.Type} Minimum: {builder.minimum} not met for {mapping_name} Collection")
-                delete_status = f"Minimum {builder.minimum} Not Met"
-                valid = False
-                if builder.details["delete_below_minimum"] and builder.obj:
-                    logger.info("")
-                    logger.info(builder.delete())
-                    library.stats["deleted"] += 1
-                    delete_status = f"Deleted; {delete_status}"
-                library.status[str(mapping_name)]["status"] = delete_status
+            if len(builder.found_items) > 0 and len(builder.found_items) + builder.beginning_count >= builder.minimum and builder.build_collection:
+                items_added, items_unchanged = builder.add_to_collection()
+                stats["added"] += items_added
+                library.status[str(mapping_name)]["added"] = items_added
+                stats["unchanged"] += items_unchanged
+                library.status[str(mapping_name)]["unchanged"] = items_unchanged
+                items_removed = 0
+                if builder.sync:
+                    items_removed = builder.sync_collection()
+                    stats["removed"] += items_removed
+                    library.status[str(mapping_name)]["removed"] = items_removed
 
-            run_item_details = True
-            if valid and builder.build_collection and (builder.builders or builder.smart_url or builder.blank_collection):
-                try:
-                    builder.load_collection()
-                    if builder.created:
-                        library.stats["created"] += 1
-                        library.status[str(mapping_name)]["status"] = "Created"
-                    elif items_added > 0 or items_removed > 0:
-                        library.stats["modified"] += 1
-                        library.status[str(mapping_name)]["status"] = "Modified"
-                except Failed:
-                    logger.stacktrace()
-                    run_item_details = False
-                    logger.info("")
-                    logger.separator(f"No {builder.Type} to Update", space=False, border=False)
-                else:
-                    details_list = builder.update_details()
-                    if details_list:
-                        pre = ""
-                        if library.status[str(mapping_name)]["status"] != "Unchanged":
-                            pre = f"{library.status[str(mapping_name)]['status']} and "
-                        library.status[str(mapping_name)]["status"] = f"{pre}Updated {', '.join(details_list)}"
-
-            if builder.server_preroll is not None:
-                library.set_server_preroll(builder.server_preroll)
-                logger.info("")
-                logger.info(f"Plex Server Movie pre-roll video updated to {builder.server_preroll}")
+            if builder.do_missing and (len(builder.missing_movies) > 0 or len(builder.missing_shows) > 0):
+                with arr_lock:
+                    radarr_add, sonarr_add = builder.run_missing()
+                stats["radarr"] += radarr_add
+                library.status[str(mapping_name)]["radarr"] += radarr_add
+                stats["sonarr"] += sonarr_add
+                library.status[str(mapping_name)]["sonarr"] += sonarr_add
 
-            if valid and run_item_details and (builder.item_details or builder.custom_sort or builder.sync_to_trakt_list):
-                try:
-                    builder.load_collection_items()
-                except Failed:
-                    logger.info("")
-                    logger.separator("No Items Found", space=False, border=False)
-                else:
-                    if builder.item_details:
-                        builder.update_item_details()
-                    if builder.custom_sort:
-                        builder.sort_collection()
-                    if builder.sync_to_trakt_list:
-                        builder.sync_trakt_list()
+            if not builder.found_items and not builder.ignore_blank_results:
+                raise NonExisting(f"{builder.Type} Warning: No items found")
 
-            builder.send_notifications()
+        valid = True
+        if builder.build_collection and not builder.blank_collection and items_added + builder.beginning_count < builder.minimum:
+            logger.info("")
+            logger.info(f"{builder.Type} Minimum: {builder.minimum} not met for {mapping_name} Collection")
+            delete_status = f"Minimum {builder.minimum} Not Met"
+            valid = False
+            if builder.details["delete_below_minimum"] and builder.obj:
+                logger.info("")
+                logger.info(builder.delete())
+                stats["deleted"] += 1
+                delete_status = f"Deleted; {delete_status}"
+            library.status[str(mapping_name)]["status"] = delete_status
 
-            if builder.run_again and (len(builder.run_again_movies) > 0 or len(builder.run_again_shows) > 0):
-                library.run_again.append(builder)
+        run_item_details = True
+        if valid and builder.build_collection and (builder.builders or builder.smart_url or builder.blank_collection):
+            try:
+                builder.load_collection()
+                if builder.created:
+                    stats["created"] += 1
+                    library.status[str(mapping_name)]["status"] = "Created"
+                elif items_added > 0 or items_removed > 0:
+                    stats["modified"] += 1
+                    library.status[str(mapping_name)]["status"] = "Modified"
+            except Failed:
+                logger.stacktrace()
+                run_item_details = False
+                logger.info("")
+                logger.separator(f"No {builder.Type} to Update", space=False, border=False)
+            else:
+                details_list = builder.update_details()
+                if details_list:
+                    pre = ""
+                    if library.status[str(mapping_name)]["status"] != "Unchanged":
+                        pre = f"{library.status[str(mapping_name)]['status']} and "
+                    library.status[str(mapping_name)]["status"] = f"{pre}Updated {', '.join(details_list)}"
+
+        if builder.server_preroll is not None:
+            library.set_server_preroll(builder.server_preroll)
+            logger.info("")
+            logger.info(f"Plex Server Movie pre-roll video updated to {builder.server_preroll}")
 
-        except NonExisting as e:
-            logger.warning(e)
-            library.status[str(mapping_name)]["status"] = "Ignored"
-        except NotScheduled as e:
-            logger.info(e)
-            if str(e).endswith("and was deleted"):
-                library.notify_delete(e)
-                library.stats["deleted"] += 1
-                library.status[str(mapping_name)]["status"] = "Deleted Not Scheduled"
-            elif str(e).startswith("Skipped because run_definition"):
-                library.status[str(mapping_name)]["status"] = "Skipped Run Definition"
+        if valid and run_item_details and (builder.item_details or builder.custom_sort or builder.sync_to_trakt_list):
+            try:
+                builder.load_collection_items()
+            except Failed:
+                logger.info("")
+                logger.separator("No Items Found", space=False, border=False)
             else:
-                library.status[str(mapping_name)]["status"] = "Not Scheduled"
-        except FilterFailed:
-            pass
-        except Failed as e:
-            library.notify(e, collection=mapping_name)
-            logger.stacktrace()
-            logger.error(e)
-            library.status[str(mapping_name)]["status"] = "PMM Failure"
-            library.status[str(mapping_name)]["errors"].append(e)
-        except Exception as e:
-            library.notify(f"Unknown Error: {e}", collection=mapping_name)
-            logger.stacktrace()
-            logger.error(f"Unknown Error: {e}")
-            library.status[str(mapping_name)]["status"] = "Unknown Error"
-            library.status[str(mapping_name)]["errors"].append(e)
-        collection_run_time = str(datetime.now() - collection_start).split('.')[0]
-        library.status[str(mapping_name)]["run_time"] = collection_run_time
-        logger.info("")
-        logger.separator(f"Finished {mapping_name} Collection\nCollection Run Time: {collection_run_time}")
-        #logger.remove_collection_handler(library.mapping_name, collection_log_name)
+                if builder.item_details:
+                    builder.update_item_details()
+                if builder.custom_sort:
+                    builder.sort_collection()
+                if builder.sync_to_trakt_list:
+                    builder.sync_trakt_list()
+
+        builder.send_notifications()
+
+        if builder.run_again and (len(builder.run_again_movies) > 0 or len(builder.run_again_shows) > 0):
+            run_again = True
+
+    except NonExisting as e:
+        logger.warning(e)
+        library.status[str(mapping_name)]["status"] = "Ignored"
+    except NotScheduled as e:
+        logger.info(e)
+        if str(e).endswith("and was deleted"):
+            library.notify_delete(e)
+            stats["deleted"] += 1
+            library.status[str(mapping_name)]["status"] = "Deleted Not Scheduled"
+        elif str(e).startswith("Skipped because run_definition"):
+            library.status[str(mapping_name)]["status"] = "Skipped Run Definition"
+        else:
+            library.status[str(mapping_name)]["status"] = "Not Scheduled"
+    except FilterFailed:
+        pass
+    except Failed as e:
+        library.notify(e, collection=mapping_name)
+        logger.stacktrace()
+        logger.error(e)
+        library.status[str(mapping_name)]["status"] = "PMM Failure"
+        library.status[str(mapping_name)]["errors"].append(e)
+    except Exception as e:
+        library.notify(f"Unknown Error: {e}", collection=mapping_name)
+        logger.stacktrace()
+        logger.error(f"Unknown Error: {e}")
+        library.status[str(mapping_name)]["status"] = "Unknown Error"
+        library.status[str(mapping_name)]["errors"].append(e)
+    collection_run_time = str(datetime.now() - collection_start).split('.')[0]
+    library.status[str(mapping_name)]["run_time"] = collection_run_time
+    logger.info("")
+    logger.separator(f"Finished {mapping_name} Collection\nCollection Run Time: {collection_run_time}")
+    #logger.remove_collection_handler(library.mapping_name, collection_log_name)
+    return stats, builder, run_again
 
 def run_playlists(config):
     stats = {"created": 0, "modified": 0, "deleted": 0, "added": 0, "unchanged": 0, "removed": 0, "radarr": 0, "sonarr": 0, "names": []}
@@ -1067,10 +1175,39 @@ def run_playlists(config):
             #logger.remove_playlist_handler(playlist_log_name)
     return status, stats
 
+def cache_snapshot(path, export=False):
+    from modules.cache import Cache
+    logger.separator(f"{'Exporting' if export else 'Importing'} Cache Snapshot")
+    logger.info("")
+    cache = Cache(os.path.abspath(run_args["config"] if run_args["config"] else os.path.join(default_dir, "config.yml")), 60)
+    try:
+        if export:
+            results = {table: (rows, rows) for table, rows in cache.export_snapshot(path).items()}
+        else:
+            results = cache.import_snapshot(path)
+        longest = max([len(t) for t in results] + [5])
+        logger.info("")
+        logger.info(f"{'Table':<{longest}} |    Rows    | {'  Exported  ' if export else '   Merged   '}")
+        logger.separator(f"{logger.separating_character * longest}|{logger.separating_character * 12}|{logger.separating_character * 12}", space=False, border=False, side_space=False, left=True)
+        for table, (rows, changed) in results.items():
+            logger.info(f"{table:<{longest}} | {rows:>10} | {changed:>10}")
+        logger.info("")
+        logger.info(f"Cache Snapshot {'Exported to' if export else 'Imported from'} {os.path.abspath(path)}")
+    except Failed as e:
+        logger.error(e)
+    finally:
+        cache.close()
+
 if __name__ == "__main__":
     try:
+        if run_args["cache-import"]:
+            cache_snapshot(run_args["cache-import"])
         if run_args["run"] or run_args["tests"] or run_args["run-collections"] or run_args["run-libraries"] or run_args["run-files"] or run_args["resume"]:
             process({"collections": run_args["run-collections"], "libraries": run_args["run-libraries"], "files": run_args["run-files"]})
+            if run_args["cache-export"]:
+                cache_snapshot(run_args["cache-export"], export=True)
+        elif run_args["cache-export"]:
+            cache_snapshot(run_args["cache-export"], export=True)
         else:
             times_to_run = util.get_list(run_args["times"])
             valid_times = []
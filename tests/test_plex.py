@@ -0,0 +1,47 @@
+import tempfile, threading, time
+from collections import defaultdict
+from modules import util
+from modules.logs import MyLogger
+
+util.logger = MyLogger("Plex Meta Manager Tests", tempfile.mkdtemp(), 100, "=", True, False, False, False)
+
+from modules import builder, plex
+from plexapi.exceptions import BadRequest
+
+
+class FakeSection:
+    def __init__(self):
+        self._edits = None
+        self.collections = defaultdict(set)
+
+    def batchMultiEdits(self, items):
+        self._edits = {"items": list(items), "tags": []}
+
+    def addCollection(self, collection):
+        if self._edits is None:
+            raise BadRequest("Batch multi-editing mode not enabled")
+        self._edits["tags"].append(collection)
+        time.sleep(0.01)
+
+    def saveMultiEdits(self):
+        if self._edits is None:
+            raise BadRequest("Batch multi-editing mode not enabled")
+        edits, self._edits = self._edits, None
+        for tag in edits["tags"]:
+            self.collections[tag].update(edits["items"])
+
+
+def test_concurrent_alter_collection_keeps_batches_separate(monkeypatch):
+    monkeypatch.setattr(plex, "multi_edit_size", 5)
+    library = object.__new__(plex.Plex)
+    library.Plex = FakeSection()
+    library._multi_edit_lock = threading.Lock()
+
+    items = {"First": list(range(0, 50)), "Second": list(range(100, 150))}
+    threads = [threading.Thread(target=library.alter_collection, args=(keys, name)) for name, keys in items.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert library.Plex.collections == {name: set(keys) for name, keys in items.items()}